@@ -0,0 +1,95 @@
+import hashlib
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from yatube import routers
+
+VERSION_KEY = 'posts:version:{}'
+PK_KEY = 'posts:pk:{}:{}'
+PK_TIMEOUT = 5 * 60
+COUNT_KEY = 'posts:count:{}'
+# Число записей нужно только для номеров страниц, поэтому его можно
+# показывать с небольшим опозданием вместо COUNT(*) на каждый запрос.
+COUNT_TIMEOUT = 60
+
+
+def _scope_key(scope):
+    return VERSION_KEY.format(scope)
+
+
+def get_version(scope):
+    """Версия области для ключей кеша и ETag. В версии записано время ее
+    создания, то есть первого чтения после записи: пока она моложе
+    REPLICA_PIN_SECONDS, реплика может не видеть изменений, и запрос
+    читает из основной базы, чтобы не сохранить старые строки под новой
+    версией.
+    """
+    key = _scope_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, f'{time.time_ns() // 10**6}-{uuid4().hex[:12]}', None)
+        version = cache.get(key)
+    if _version_age(version) < settings.REPLICA_PIN_SECONDS:
+        routers.pin_to_primary()
+    return version
+
+
+def _version_age(version):
+    try:
+        return time.time() - int(str(version).partition('-')[0]) / 1000
+    except ValueError:
+        return float('inf')
+
+
+def bump(*scopes):
+    cache.delete_many([_scope_key(scope) for scope in scopes])
+
+
+def cached_pk(model, **lookup):
+    (field, value), = lookup.items()
+    key = PK_KEY.format(model._meta.label_lower, f'{field}={value}')
+    pk = cache.get(key)
+    if pk is None:
+        pk = model.objects.filter(**lookup).values_list(
+            'pk', flat=True
+        ).first()
+        if pk is not None:
+            cache.set(key, pk, PK_TIMEOUT)
+    return pk
+
+
+def cached_count(scope, queryset):
+    key = COUNT_KEY.format(scope)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.order_by().count()
+        cache.set(key, count, COUNT_TIMEOUT)
+    return count
+
+
+def post_scopes(post, *group_ids):
+    scopes = {'feed', f'author:{post.author_id}'}
+    for group_id in (post.group_id, *group_ids):
+        if group_id:
+            scopes.add(f'group:{group_id}')
+    return scopes
+
+
+def viewer_class(user, posts):
+    if not user.is_authenticated:
+        return 'guest'
+    if any(post.author_id == user.pk for post in posts):
+        return f'author:{user.pk}'
+    return 'member'
+
+
+def etag(scope, request):
+    viewer = request.user.pk if request.user.is_authenticated else 'guest'
+    # В странице есть CSRF-токен формы: вход и выход меняют секрет, и
+    # закешированная в браузере копия с прежним токеном не годится.
+    csrf = request.META.get('CSRF_COOKIE', '')
+    raw = f'{get_version(scope)}:{viewer}:{csrf}:{request.GET.urlencode()}'
+    return hashlib.md5(raw.encode()).hexdigest()
@@ -0,0 +1,71 @@
+from django.db.models import Count, F
+
+from .models import AuthorStats, Follow, Post, User
+
+
+def count_stats(user_id):
+    return {
+        'posts_count': Post.objects.filter(author_id=user_id).count(),
+        'followers_count': Follow.objects.filter(author_id=user_id).count(),
+        'following_count': Follow.objects.filter(user_id=user_id).count(),
+    }
+
+
+def get_stats(user):
+    stats = AuthorStats.objects.filter(user=user).first()
+    if stats is None:
+        stats, _ = AuthorStats.objects.get_or_create(
+            user=user, defaults=count_stats(user.pk)
+        )
+    return stats
+
+
+def bump_stats(user_id, **deltas):
+    updated = AuthorStats.objects.filter(user_id=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+    # Отсутствующая строка считается с нуля при первом чтении, а при
+    # удалениях ее не создаем: автор может удаляться каскадом.
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        AuthorStats.objects.get_or_create(
+            user_id=user_id, defaults=count_stats(user_id)
+        )
+
+
+def bump_comment_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F('comment_count') + delta,
+        version=F('version') + 1
+    )
+
+
+def _grouped_counts(queryset, field):
+    return dict(
+        queryset.order_by().values_list(field).annotate(total=Count('pk'))
+    )
+
+
+def find_post_drift():
+    return Post.objects.order_by().annotate(
+        actual=Count('comments')
+    ).exclude(comment_count=F('actual')).values_list('pk', 'actual')
+
+
+def find_stats_drift():
+    posts = _grouped_counts(Post.objects.all(), 'author')
+    followers = _grouped_counts(Follow.objects.all(), 'author')
+    following = _grouped_counts(Follow.objects.all(), 'user')
+    stored = {
+        stats.user_id: stats for stats in AuthorStats.objects.iterator()
+    }
+    for user_id in User.objects.values_list('pk', flat=True).iterator():
+        actual = {
+            'posts_count': posts.get(user_id, 0),
+            'followers_count': followers.get(user_id, 0),
+            'following_count': following.get(user_id, 0),
+        }
+        stats = stored.get(user_id)
+        if stats is None or any(
+            getattr(stats, field) != value for field, value in actual.items()
+        ):
+            yield user_id, actual
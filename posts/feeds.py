@@ -0,0 +1,100 @@
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import truncatewords
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
+
+from . import caching
+from .models import Group, User
+
+FEED_SIZE = 20
+FEED_TIMEOUT = 60 * 60
+
+
+class PostFeed(Feed):
+    feed_type = Atom1Feed
+
+    def item_title(self, post):
+        return truncatewords(post.text, 10)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('post', args=[post.author.username, post.pk])
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+
+class GroupFeed(PostFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return group.title
+
+    def subtitle(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('groups', args=[group.slug])
+
+    def items(self, group):
+        return group.posts.for_feed()[:FEED_SIZE]
+
+
+class AuthorFeed(PostFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Записи {author.get_full_name() or author.username}'
+
+    def link(self, author):
+        return reverse('profile', args=[author.username])
+
+    def items(self, author):
+        return author.posts.for_feed()[:FEED_SIZE]
+
+
+def versioned(feed, scope_for):
+    """Отдает ленту из кеша по версии области и отвечает 304 на повторные
+    запросы, не обращаясь к базе, пока в области ничего не изменилось.
+    """
+    def etag(request, **kwargs):
+        scope = scope_for(**kwargs)
+        return scope and caching.get_version(scope)
+
+    @condition(etag_func=etag)
+    def view(request, **kwargs):
+        scope = scope_for(**kwargs)
+        if scope is None:
+            return feed(request, **kwargs)
+        key = f'posts:feed:{scope}:{caching.get_version(scope)}'
+        response = cache.get(key)
+        if response is None:
+            response = feed(request, **kwargs)
+            cache.set(key, response, FEED_TIMEOUT)
+        return response
+
+    return view
+
+
+def _group_scope(slug):
+    group_id = caching.cached_pk(Group, slug=slug)
+    return group_id and f'group:{group_id}'
+
+
+def _author_scope(username):
+    author_id = caching.cached_pk(User, username=username)
+    return author_id and f'author:{author_id}'
+
+
+group_feed = versioned(GroupFeed(), _group_scope)
+author_feed = versioned(AuthorFeed(), _author_scope)
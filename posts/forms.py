@@ -1,6 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import Textarea
 
+from posts.images import ingest_upload
 from posts.models import Post, Comment
 
 
@@ -9,6 +11,12 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('group', 'text', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            return ingest_upload(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,127 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps
+
+THUMBNAIL_SIZE = (960, 339)
+THUMBNAIL_WIDTHS = (480, 960, 1440)
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+ORIGINAL_QUALITY = 90
+
+
+# Значения EXIF Orientation, при которых картинка повернута на 90°.
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+EXIF_ORIENTATION = 0x0112
+
+
+def is_transposed(image):
+    return image.getexif().get(EXIF_ORIENTATION) in TRANSPOSED_ORIENTATIONS
+
+
+def display_size(image):
+    width, height = image.size
+    return (height, width) if is_transposed(image) else (width, height)
+
+
+def open_image(name, size):
+    """Открывает картинку повернутой так, как ее показывает телефон:
+    EXIF Orientation применяется сразу после декодирования.
+    """
+    with default_storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        if is_transposed(image):
+            size = size[::-1]
+        # Для JPEG декодер сразу уменьшает картинку кратно 1/2..1/8.
+        image.draft('RGB', size)
+        image.load()
+    return ImageOps.exif_transpose(image)
+
+
+def thumbnail_widths(source_width):
+    default_width = THUMBNAIL_SIZE[0]
+    return [
+        width for width in THUMBNAIL_WIDTHS
+        if width <= max(source_width, default_width)
+    ]
+
+
+def make_thumbnails(name):
+    """Создает миниатюры всех ширин в WebP и JPEG из одного декодирования.
+
+    Возвращает {'webp': [[ширина, высота, имя], ...], 'jpeg': [...]}.
+    """
+    default_width, default_height = THUMBNAIL_SIZE
+    with default_storage.open(name, 'rb') as source:
+        source_width = display_size(Image.open(source))[0]
+    widths = thumbnail_widths(source_width)
+    largest = (widths[-1], round(widths[-1] * default_height / default_width))
+    image = ImageOps.fit(
+        open_image(name, largest).convert('RGB'), largest, Image.LANCZOS
+    )
+    stem = os.path.splitext(os.path.basename(name))[0]
+    variants = {extension: [] for extension in THUMBNAIL_FORMATS}
+    for width in reversed(widths):
+        size = (width, round(width * default_height / default_width))
+        if size != image.size:
+            image = image.resize(size, Image.LANCZOS)
+        for extension, (image_format, options) in THUMBNAIL_FORMATS.items():
+            buffer = BytesIO()
+            image.save(buffer, image_format, **options)
+            stored = default_storage.save(
+                f'thumbnails/{stem}_{size[0]}x{size[1]}.{extension}',
+                ContentFile(buffer.getvalue())
+            )
+            variants[extension].insert(0, [size[0], size[1], stored])
+    return variants
+
+
+def ingest_upload(upload):
+    """Проверяет загруженную картинку и при необходимости один раз
+    перекодирует ее в уменьшенный оригинал.
+
+    Файл читается с диска или из памяти лениво: Pillow разбирает только
+    заголовок, а JPEG декодируется сразу в уменьшенном масштабе.
+    """
+    if upload.size > settings.POST_IMAGE_MAX_BYTES:
+        raise ValidationError(
+            'Файл слишком большой: не более %(limit)s МБ.',
+            code='file_too_large',
+            params={'limit': settings.POST_IMAGE_MAX_BYTES // 2 ** 20},
+        )
+    upload.seek(0)
+    image = Image.open(upload)
+    width, height = image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка слишком большая: не более %(limit)s мегапикселей.',
+            code='too_many_pixels',
+            params={'limit': settings.POST_IMAGE_MAX_PIXELS // 10 ** 6},
+        )
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    if max(width, height) <= max_side:
+        upload.seek(0)
+        return upload
+    image.draft('RGB', (max_side, max_side))
+    image.thumbnail((max_side, max_side), Image.LANCZOS, reducing_gap=2.0)
+    image = ImageOps.exif_transpose(image)
+    buffer = BytesIO()
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        image_format, extension, content_type = 'PNG', 'png', 'image/png'
+        image.convert('RGBA').save(buffer, image_format, optimize=True)
+    else:
+        image_format, extension, content_type = 'JPEG', 'jpg', 'image/jpeg'
+        image.convert('RGB').save(
+            buffer, image_format, quality=ORIGINAL_QUALITY, optimize=True
+        )
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    return SimpleUploadedFile(
+        f'{stem}.{extension}', buffer.getvalue(), content_type
+    )
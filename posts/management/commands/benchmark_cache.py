@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import time
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'filebased': 'django.core.cache.backends.filebased.FileBasedCache',
+    'sqlite': 'yatube.cache.SQLiteCache',
+}
+PHASES = ('set', 'get hit', 'get miss', 'incr')
+
+
+def make_cache(backend, location):
+    return import_string(BACKENDS[backend])(location, {
+        'TIMEOUT': 300, 'OPTIONS': {'MAX_ENTRIES': 10 ** 6},
+    })
+
+
+def workload(backend, location, worker, operations, value_size):
+    cache = make_cache(backend, location)
+    value = 'x' * value_size
+    keys = [f'w{worker}:k{i}' for i in range(operations)]
+    cache.add('counter', 0)
+    phases = {
+        'set': lambda key: cache.set(key, value),
+        'get hit': cache.get,
+        'get miss': lambda key: cache.get(f'{key}:missing'),
+        'incr': lambda key: cache.incr('counter'),
+    }
+    timings = {}
+    for name in PHASES:
+        started = time.perf_counter()
+        for key in keys:
+            phases[name](key)
+        timings[name] = time.perf_counter() - started
+    return timings
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность кеша SQLite с LocMemCache и '
+        'FileBasedCache.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--operations', type=int, default=5000,
+            help='Сколько операций каждого вида в одном процессе.'
+        )
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Сколько процессов одновременно работают с кешем.'
+        )
+        parser.add_argument(
+            '--value-size', type=int, default=2048,
+            help='Размер значения в байтах, по умолчанию как у фрагмента.'
+        )
+        parser.add_argument(
+            '--backend', action='append', dest='backends', default=[],
+            choices=sorted(BACKENDS),
+        )
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        operations = options['operations']
+        self.stdout.write('Операций в секунду:')
+        self.stdout.write(
+            f'{"бэкенд":<10}' + ''.join(f'{name:>12}' for name in PHASES)
+        )
+        for backend in options['backends'] or list(BACKENDS):
+            directory = tempfile.mkdtemp()
+            location = (
+                os.path.join(directory, 'cache.sqlite3')
+                if backend == 'sqlite' else directory
+            )
+            try:
+                arguments = [
+                    (backend, location, worker, operations,
+                     options['value_size'])
+                    for worker in range(processes)
+                ]
+                with get_context('fork').Pool(processes) as pool:
+                    results = pool.starmap(workload, arguments)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+            # Пропускная способность фазы считается по самому медленному
+            # процессу: остальные к этому моменту уже закончили.
+            rates = [
+                operations * processes / max(
+                    timings[name] for timings in results
+                )
+                for name in PHASES
+            ]
+            self.stdout.write(
+                f'{backend:<10}' + ''.join(f'{rate:>12.0f}' for rate in rates)
+            )
+        if processes > 1:
+            self.stdout.write(
+                'LocMemCache у каждого процесса свой: его данные не видны '
+                'другим процессам.'
+            )
@@ -0,0 +1,106 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Group, Post
+from yatube import compression
+
+CHUNK_SIZE = 4096
+
+
+def encoders():
+    variants = {
+        f'gzip-{level}': (
+            lambda level=level: compression.GzipEncoder(level), False
+        )
+        for level in (1, 6, 9)
+    }
+    variants['gzip-6 поток'] = (lambda: compression.GzipEncoder(6), True)
+    variants['gzip-6 BREACH'] = (
+        lambda: compression.GzipEncoder(6, padding=100), False
+    )
+    if compression.brotli is not None:
+        for quality in (4, 5, 11):
+            variants[f'br-{quality}'] = (
+                lambda quality=quality: compression.BrotliEncoder(quality),
+                False
+            )
+    return variants
+
+
+class Command(BaseCommand):
+    help = (
+        'Сжимает HTML лент из текущей базы разными кодировщиками и '
+        'сравнивает затраты процессора с экономией трафика.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help='Сколько раз сжимать каждую страницу каждым кодировщиком.'
+        )
+
+    def handle(self, *args, **options):
+        pages = self.pages()
+        if compression.brotli is None:
+            self.stdout.write('brotli не установлен: замеряется только gzip.')
+        self.stdout.write(
+            f'{"страница":<10}{"кодировщик":<16}{"байт":>9}{"сжато":>9}'
+            f'{"экономия":>10}{"мс":>8}{"МБ/с":>8}'
+        )
+        for name, html in pages.items():
+            for encoder, (make, streaming) in encoders().items():
+                size, milliseconds = self.measure(
+                    make, streaming, html, options['repeat']
+                )
+                self.stdout.write(
+                    f'{name:<10}{encoder:<16}{len(html):>9}{size:>9}'
+                    f'{1 - size / len(html):>10.1%}{milliseconds:>8.2f}'
+                    f'{len(html) / milliseconds / 1000:>8.1f}'
+                )
+
+    def pages(self):
+        post = Post.objects.select_related('author').order_by(
+            '-author__stats__posts_count', '-pk'
+        ).first()
+        group = Group.objects.filter(posts__isnull=False).first()
+        if post is None or group is None:
+            raise CommandError(
+                'В базе нет постов с группой: сначала запустите '
+                'seed_benchmark_data.'
+            )
+        urls = {
+            'index': reverse('index'),
+            'group': reverse('groups', args=[group.slug]),
+            'profile': reverse('profile', args=[post.author.username]),
+        }
+        client = Client()
+        pages = {}
+        for name, url in urls.items():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url} ответил {response.status_code}.')
+            pages[name] = response.content
+        return pages
+
+    def measure(self, make, streaming, html, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            encoder = make()
+            if streaming:
+                chunks = (
+                    html[start:start + CHUNK_SIZE]
+                    for start in range(0, len(html), CHUNK_SIZE)
+                )
+                size = sum(
+                    len(data) for data in
+                    compression.compress_sequence(encoder, chunks)
+                )
+            else:
+                size = len(compression.compress(encoder, html))
+            timings.append((time.perf_counter() - started) * 1000)
+        return size, statistics.median(timings)
@@ -0,0 +1,178 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+
+FEED_INDEXES = (
+    'post_pub_date_idx',
+    'post_author_pub_date_idx',
+    'post_group_pub_date_idx',
+    'comment_post_created_idx',
+    'follow_author_user_idx',
+)
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает планы и время запросов лент с составными индексами '
+        'и без них.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=0, metavar='POSTS',
+            help='Догенерировать синтетические посты, комментарии и '
+                 'подписки до указанного числа постов.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз выполнять каждый запрос.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Бенчмарк рассчитан на SQLite.')
+        if options['seed']:
+            self.seed(options['seed'])
+        patterns = self.access_patterns()
+        if not patterns:
+            raise CommandError('База пуста: запустите команду с --seed.')
+        with_indexes = self.measure(patterns, options['repeat'])
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for name in FEED_INDEXES:
+                    cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+            without_indexes = self.measure(patterns, options['repeat'])
+            transaction.set_rollback(True)
+        for name in patterns:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label, results in (
+                ('без индексов', without_indexes),
+                ('с индексами', with_indexes),
+            ):
+                plan, timing = results[name]
+                self.stdout.write(f'  {label}: {timing:.3f} мс')
+                for line in plan:
+                    self.stdout.write(f'    {line}')
+
+    def access_patterns(self):
+        post = Post.objects.order_by('-comment_count').first()
+        if post is None:
+            return {}
+        author = User.objects.annotate(
+            total=Count('posts')
+        ).order_by('-total').first()
+        patterns = {
+            'index': Post.objects.for_feed()[:11],
+            'profile': author.posts.for_feed()[:11],
+            'post comments': Comment.objects.filter(
+                post=post
+            ).order_by('created')[:50],
+            'followers fan-out': Follow.objects.filter(
+                author=author
+            ).values_list('user_id', flat=True),
+        }
+        group = Group.objects.annotate(
+            total=Count('posts')
+        ).order_by('-total').first()
+        if group is not None:
+            patterns['group'] = group.posts.for_feed()[:11]
+        reader = TimelineEntry.objects.values_list(
+            'user_id', flat=True
+        ).first()
+        if reader is not None:
+            patterns['follow timeline'] = TimelineEntry.objects.filter(
+                user_id=reader
+            ).for_feed()[:11]
+        return patterns
+
+    def measure(self, patterns, repeat):
+        results = {}
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            for name, queryset in patterns.items():
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = [row[-1] for row in cursor.fetchall()]
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    cursor.execute(sql, params)
+                    cursor.fetchall()
+                    timings.append((time.perf_counter() - started) * 1000)
+                results[name] = (plan, statistics.median(timings))
+        return results
+
+    def seed(self, total_posts):
+        missing = total_posts - Post.objects.count()
+        if missing <= 0:
+            return
+        rng = random.Random(total_posts)
+        users = list(User.objects.values_list('pk', flat=True))
+        new_users = max(total_posts // 100 - len(users), 0)
+        User.objects.bulk_create(
+            [
+                User(username=f'bench-{len(users) + i}', password='!')
+                for i in range(new_users)
+            ]
+        )
+        users = list(User.objects.values_list('pk', flat=True))
+        if not Group.objects.exists():
+            Group.objects.bulk_create([
+                Group(title=f'Группа {i}', slug=f'bench-{i}', description='')
+                for i in range(50)
+            ])
+        groups = list(Group.objects.values_list('pk', flat=True)) + [None]
+        started = timezone.now() - timedelta(days=365)
+        post_pk = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        pub_date_field = Post._meta.get_field('pub_date')
+        created_field = Comment._meta.get_field('created')
+        pub_date_field.auto_now_add = created_field.auto_now_add = False
+        try:
+            for offset in range(0, missing, BATCH_SIZE):
+                size = min(BATCH_SIZE, missing - offset)
+                posts = [
+                    Post(
+                        pk=post_pk + offset + i + 1,
+                        text=f'Синтетический пост {offset + i}',
+                        author_id=rng.choice(users),
+                        group_id=rng.choice(groups),
+                        pub_date=started + timedelta(
+                            seconds=rng.randrange(365 * 24 * 3600)
+                        ),
+                        comment_count=1,
+                    )
+                    for i in range(size)
+                ]
+                with transaction.atomic():
+                    Post.objects.bulk_create(posts)
+                    Comment.objects.bulk_create([
+                        Comment(
+                            post_id=post.pk, author_id=rng.choice(users),
+                            text='Синтетический комментарий',
+                            created=post.pub_date + timedelta(minutes=5)
+                        )
+                        for post in posts
+                    ])
+                self.stdout.write(f'Создано постов: {offset + size}')
+        finally:
+            pub_date_field.auto_now_add = created_field.auto_now_add = True
+        Follow.objects.bulk_create(
+            [
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id in users
+                for author_id in rng.sample(users, min(20, len(users)))
+                if author_id != user_id
+            ],
+            ignore_conflicts=True
+        )
@@ -0,0 +1,153 @@
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.template import Context, Engine
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from posts.models import Group, Post, User
+
+# Карточка поста в прежнем виде: include на каждый пост со своим
+# фрагментным кешем, фильтром и четырьмя {% url %}.
+INCLUDE_ITEM = '''{% load cache post_tags %}
+{% cache 600 post_item post.pk post.version user|is_author_of:post %}
+<div class="card mb-3 mt-1 shadow-sm">
+    <div class="card-body">
+        <p class="card-text">
+            <a href='{% url "profile" post.author.username %}' >
+            <strong class="d-block text-gray-dark">
+            @{{ post.author.username }}</strong></a>
+            {{ post.text|linebreaksbr }}
+        </p>
+        {% if post.group %}
+            <a class="card-link muted"
+               href="{% url 'groups' post.group.slug %}">
+            <strong class="d-block text-gray-dark">
+            #{{ post.group.title }}</strong>
+            </a>
+        {% endif %}
+        <div class="d-flex justify-content-between align-items-center">
+            <div class="btn-group">
+            {% if post.comment_count %}
+                <div>
+                    Комментариев: {{ post.comment_count }} &emsp;
+                </div>
+            {% endif %}
+                <a class="btn btn-sm btn-primary"
+                   href="{% url 'post' post.author.username post.id %}"
+                   role="button">
+                    Добавить комментарий
+                </a>
+                {% if user|is_author_of:post %}
+                <a class="btn btn-sm btn-info"
+                   href="{% url 'post_edit' post.author.username post.id %}"
+                   role="button">Редактировать</a>
+                {% endif%}
+            </div>
+            <small class="text-muted">{{ post.pub_date|date:"d M Y" }}</small>
+        </div>
+    </div>
+</div>
+{% endcache %}'''
+INCLUDE_PAGE = (
+    '{% load post_tags %}{% for post in posts %}'
+    '{% include "legacy/post_item.html" with post=post %}{% endfor %}'
+)
+TAG_PAGE = '{% load post_tags %}{% post_list posts %}'
+
+
+def make_posts(count):
+    authors = [
+        User(pk=number, username=f'author{number}')
+        for number in range(1, 21)
+    ]
+    groups = [
+        Group(pk=number, slug=f'group-{number}', title=f'Группа {number}')
+        for number in range(1, 6)
+    ]
+    now = timezone.now()
+    return [
+        Post(
+            pk=number, text=f'Пост {number}\nвторая строка',
+            author=authors[number % len(authors)],
+            group=groups[number % len(groups)] if number % 3 else None,
+            pub_date=now, comment_count=number % 4,
+        )
+        for number in range(1, count + 1)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендеринга ленты тегом post_list и прежним '
+        'include на каждый пост.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10, 100, 1000],
+            help='Сколько постов на странице.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз рендерить каждый вариант.'
+        )
+
+    def handle(self, *args, **options):
+        # Как в рабочем режиме: скомпилированные шаблоны берутся из
+        # кеширующего загрузчика, а не читаются с диска при каждом include.
+        engine = Engine(
+            dirs=[settings.TEMPLATES_DIR],
+            loaders=[('django.template.loaders.cached.Loader', [
+                ('django.template.loaders.locmem.Loader', {
+                    'legacy/post_item.html': INCLUDE_ITEM,
+                }),
+                'django.template.loaders.filesystem.Loader',
+            ])],
+            libraries={
+                'cache': 'django.templatetags.cache',
+                'post_tags': 'posts.templatetags.post_tags',
+            },
+        )
+        pages = {
+            'include': engine.from_string(INCLUDE_PAGE),
+            'post_list': engine.from_string(TAG_PAGE),
+        }
+        self.stdout.write(
+            f'{"постов":>7}{"вариант":>11}{"холодный, мс":>15}'
+            f'{"из кеша, мс":>14}'
+        )
+        # Отдельный кеш в памяти: замеры не трогают кеш сайта.
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'benchmark_post_list',
+            'OPTIONS': {'MAX_ENTRIES': 10 ** 5},
+        }}):
+            for size in options['sizes']:
+                posts = make_posts(size)
+                user = AnonymousUser()
+                for name, page in pages.items():
+                    context = {'posts': posts, 'user': user}
+                    cold = self.measure(page, context, options['repeat'])
+                    warm = self.measure(
+                        page, context, options['repeat'], clear=False
+                    )
+                    self.stdout.write(
+                        f'{size:>7}{name:>11}{cold:>15.2f}{warm:>14.2f}'
+                    )
+
+    def measure(self, page, context, repeat, clear=True):
+        cache.clear()
+        page.render(Context(context))
+        timings = []
+        for _ in range(repeat):
+            if clear:
+                cache.clear()
+            started = time.perf_counter()
+            page.render(Context(context))
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,293 @@
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+from urllib.parse import urlencode
+from wsgiref.util import setup_testing_defaults
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished
+from django.core.wsgi import get_wsgi_application
+from django.db import close_old_connections, connection
+from django.db.models import Count
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет запросы к представлениям постов через WSGI-приложение '
+        'и сообщает задержки, число SQL-запросов и аллокации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Сколько замеряемых запросов на каждое представление.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help='Сколько запросов сделать до замеров.'
+        )
+        parser.add_argument(
+            '--trace', type=int, default=20,
+            help='Сколько запросов выполнить под tracemalloc.'
+        )
+        parser.add_argument(
+            '--user', help='Читатель для лент подписок и записи; '
+                           'по умолчанию самый подписанный.'
+        )
+        parser.add_argument(
+            '--view', action='append', dest='views', default=[],
+            help='Замерить только указанные представления.'
+        )
+        parser.add_argument(
+            '--read-only', action='store_true',
+            help='Не замерять представления, которые пишут в базу.'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом.'
+        )
+        parser.add_argument(
+            '--output', help='Записать результаты в JSON-файл.'
+        )
+        parser.add_argument(
+            '--baseline', help='JSON прошлого прогона для сравнения.'
+        )
+
+    def handle(self, *args, **options):
+        self.app = get_wsgi_application()
+        self.cold = options['cold']
+        scenarios = self.scenarios(options)
+        if options['views']:
+            unknown = set(options['views']) - set(scenarios)
+            if unknown:
+                raise CommandError(
+                    f'Неизвестные представления: {", ".join(sorted(unknown))}'
+                )
+            scenarios = {
+                name: scenarios[name] for name in options['views']
+            }
+        # Как и тестовый клиент, не закрываем соединение после каждого
+        # запроса: иначе замеры включают переподключение к базе.
+        request_finished.disconnect(close_old_connections)
+        try:
+            results = {
+                name: self.measure(scenario, options)
+                for name, scenario in scenarios.items()
+            }
+        finally:
+            request_finished.connect(close_old_connections)
+        report = {
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'cold_cache': self.cold,
+            },
+            'dataset': {
+                'users': User.objects.count(),
+                'groups': Group.objects.count(),
+                'posts': Post.objects.count(),
+                'comments': Comment.objects.count(),
+                'follows': Follow.objects.count(),
+            },
+            'views': results,
+        }
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as source:
+                baseline = json.load(source)['views']
+        self.print_report(results, baseline)
+        if options['output']:
+            output = (
+                sys.stdout if options['output'] == '-'
+                else open(options['output'], 'w', encoding='utf-8')
+            )
+            json.dump(report, output, indent=2, ensure_ascii=False)
+            output.write('\n')
+            if output is not sys.stdout:
+                output.close()
+
+    def scenarios(self, options):
+        post = Post.objects.order_by('-comment_count', '-pk').select_related(
+            'author'
+        ).first()
+        if post is None:
+            raise CommandError(
+                'База пуста: сначала запустите seed_benchmark_data.'
+            )
+        if options['user']:
+            reader = User.objects.filter(username=options['user']).first()
+            if reader is None:
+                raise CommandError(f'Нет пользователя {options["user"]}.')
+        else:
+            reader = User.objects.annotate(
+                total=Count('follower')
+            ).order_by('-total', 'pk').first()
+        author = User.objects.annotate(
+            total=Count('posts')
+        ).order_by('-total', 'pk').first()
+        scenarios = {
+            'index': lambda i: ('GET', reverse('index'), None),
+            'profile': lambda i: (
+                'GET', reverse('profile', args=[author.username]), None
+            ),
+            'post_view': lambda i: (
+                'GET', reverse('post', args=[post.author.username, post.pk]),
+                None
+            ),
+        }
+        group = Group.objects.annotate(
+            total=Count('posts')
+        ).order_by('-total', 'pk').first()
+        if group is not None:
+            scenarios['group_posts'] = lambda i: (
+                'GET', reverse('groups', args=[group.slug]), None
+            )
+
+        self.cookies = {}
+        client = Client()
+        client.force_login(reader)
+        self.cookies[settings.SESSION_COOKIE_NAME] = client.cookies[
+            settings.SESSION_COOKIE_NAME
+        ].value
+        csrf_request = HttpRequest()
+        self.csrf_token = get_token(csrf_request)
+        self.cookies[settings.CSRF_COOKIE_NAME] = csrf_request.META[
+            'CSRF_COOKIE'
+        ]
+
+        scenarios['follow_index'] = lambda i: (
+            'GET', reverse('follow_index'), None
+        )
+        if options['read_only']:
+            return scenarios
+        scenarios['new_post'] = lambda i: (
+            'POST', reverse('new_post'), {'text': f'Бенчмарк {i}'}
+        )
+        scenarios['add_comment'] = lambda i: (
+            'POST', reverse('add_comment', args=[
+                post.author.username, post.pk
+            ]), {'text': f'Комментарий {i}'}
+        )
+        if author != reader:
+            # Чередуем подписку и отписку, чтобы граф не менялся.
+            scenarios['follow_toggle'] = lambda i: (
+                'GET', reverse(
+                    'profile_unfollow' if i % 2 else 'profile_follow',
+                    args=[author.username]
+                ), None
+            )
+        return scenarios
+
+    def request(self, method, path, data):
+        body = b''
+        if data is not None:
+            body = urlencode(
+                {**data, 'csrfmiddlewaretoken': self.csrf_token}
+            ).encode()
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'HTTP_COOKIE': '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items()
+            ),
+            'wsgi.input': BytesIO(body),
+        }
+        setup_testing_defaults(environ)
+        statuses = []
+        response = self.app(
+            environ, lambda status, headers, exc_info=None: statuses.append(
+                int(status.split()[0])
+            )
+        )
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return statuses[0]
+
+    def run(self, scenario, iteration):
+        if self.cold:
+            cache.clear()
+        return self.request(*scenario(iteration))
+
+    def measure(self, scenario, options):
+        iteration = 0
+        for iteration in range(options['warmup']):
+            self.run(scenario, iteration)
+        timings, queries, statuses = [], [], set()
+        for iteration in range(iteration + 1, iteration + 1 + options[
+            'requests'
+        ]):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                statuses.add(self.run(scenario, iteration))
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+        peaks, retained = [], []
+        for iteration in range(iteration + 1, iteration + 1 + options[
+            'trace'
+        ]):
+            tracemalloc.start()
+            try:
+                self.run(scenario, iteration)
+                current, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            peaks.append(peak / 1024)
+            retained.append(current / 1024)
+        return {
+            'status': sorted(statuses),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'queries': round(statistics.mean(queries), 2),
+            'max_queries': max(queries),
+            'peak_kib': round(statistics.median(peaks), 1) if peaks else None,
+            'retained_kib': (
+                round(statistics.median(retained), 1) if retained else None
+            ),
+        }
+
+    def print_report(self, results, baseline):
+        for name, result in results.items():
+            line = (
+                f'{name:<14} p50 {result["p50_ms"]:8.2f} мс  '
+                f'p95 {result["p95_ms"]:8.2f} мс  '
+                f'p99 {result["p99_ms"]:8.2f} мс  '
+                f'SQL {result["queries"]:5.1f}  '
+                f'пик {result["peak_kib"] or 0:8.1f} КиБ  '
+                f'коды {result["status"]}'
+            )
+            previous = (baseline or {}).get(name)
+            if previous:
+                change = (
+                    result['p50_ms'] / previous['p50_ms'] - 1
+                ) * 100 if previous['p50_ms'] else 0
+                line += f'  p50 {change:+.1f}%'
+            self.stdout.write(line)
@@ -0,0 +1,196 @@
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+
+from posts.models import Comment, Group, Post, User
+from yatube.db.writes import is_locked_error, run_serialized
+
+ALIAS = 'benchmark'
+MODES = {
+    # Стандартный бэкенд Django: журнал отката, отложенные транзакции и
+    # ожидание блокировки по умолчанию в 5 секунд.
+    'stock': {
+        'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': {},
+    },
+    'tuned': {
+        'ENGINE': 'yatube.db', 'OPTIONS': {'timeout': 20},
+    },
+    'queued': {
+        'ENGINE': 'yatube.db', 'OPTIONS': {'timeout': 20},
+    },
+}
+
+
+def use_database(mode, path):
+    connections.databases[ALIAS] = {**MODES[mode], 'NAME': path}
+    connections.ensure_defaults(ALIAS)
+    connections.prepare_test_settings(ALIAS)
+
+
+def add_comment(post_id, author_id):
+    # Как представление add_comment: прочитать пост, потом записать
+    # комментарий и обновить счетчик в одной транзакции.
+    Post.objects.using(ALIAS).filter(pk=post_id).values_list(
+        'pk', flat=True
+    ).get()
+    Comment.objects.using(ALIAS).bulk_create([
+        Comment(post_id=post_id, author_id=author_id, text='Комментарий')
+    ])
+    Post.objects.using(ALIAS).filter(pk=post_id).update(
+        comment_count=F('comment_count') + 1
+    )
+
+
+def client(mode, operations, write_ratio, posts, users, seed, results):
+    rng = random.Random(seed)
+    counts = Counter()
+    for _ in range(operations):
+        try:
+            if rng.random() < write_ratio:
+                arguments = (rng.randint(1, posts), rng.randint(1, users))
+                if mode == 'queued':
+                    run_serialized(add_comment, *arguments, using=ALIAS)
+                else:
+                    with transaction.atomic(using=ALIAS):
+                        add_comment(*arguments)
+                counts['writes'] += 1
+            else:
+                list(Post.objects.using(ALIAS).values_list(
+                    'pk', 'text', 'comment_count'
+                )[:10])
+                counts['reads'] += 1
+        except OperationalError as error:
+            if not is_locked_error(error):
+                raise
+            counts['errors'] += 1
+    connections[ALIAS].close()
+    results.append(counts)
+
+
+def worker(mode, path, threads, operations, write_ratio, posts, users,
+           seed):
+    use_database(mode, path)
+    results = []
+    clients = [
+        threading.Thread(target=client, args=(
+            mode, operations, write_ratio, posts, users, seed + number,
+            results,
+        ))
+        for number in range(threads)
+    ]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    return sum(results, Counter())
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает копию схемы SQLite одновременными читателями и '
+        'писателями и сравнивает стандартный бэкенд с настроенным и с '
+        'очередью записи.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=4,
+            help='Сколько процессов, как воркеров сервера приложений.'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Сколько потоков в каждом процессе.'
+        )
+        parser.add_argument(
+            '--operations', type=int, default=200,
+            help='Сколько операций выполняет каждый поток.'
+        )
+        parser.add_argument(
+            '--write-ratio', type=float, default=0.2,
+            help='Доля операций записи.'
+        )
+        parser.add_argument(
+            '--posts', type=int, default=1000,
+            help='Сколько постов в тестовой базе.'
+        )
+        parser.add_argument(
+            '--mode', action='append', dest='modes', default=[],
+            choices=list(MODES),
+        )
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp()
+        try:
+            template = os.path.join(directory, 'template.sqlite3')
+            users = self.create_template(template, options['posts'])
+            self.stdout.write(
+                f'{"режим":<8}{"операций/с":>12}{"чтений/с":>12}'
+                f'{"записей/с":>12}{"ошибок":>8}'
+            )
+            for mode in options['modes'] or list(MODES):
+                path = os.path.join(directory, f'{mode}.sqlite3')
+                shutil.copy(template, path)
+                if mode == 'stock':
+                    with sqlite3.connect(path) as database:
+                        database.execute('PRAGMA journal_mode = DELETE')
+                self.report(mode, self.run(mode, path, users, options))
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def create_template(self, path, posts):
+        use_database('tuned', path)
+        try:
+            with connections[ALIAS].schema_editor() as editor:
+                for model in (User, Group, Post, Comment):
+                    editor.create_model(model)
+            users = max(posts // 20, 1)
+            User.objects.using(ALIAS).bulk_create(
+                User(username=f'writer{number}', password='!')
+                for number in range(users)
+            )
+            Post.objects.using(ALIAS).bulk_create(
+                Post(text=f'Пост {number}', author_id=number % users + 1)
+                for number in range(posts)
+            )
+            connections[ALIAS].cursor().execute(
+                'PRAGMA wal_checkpoint(TRUNCATE)'
+            )
+        finally:
+            connections[ALIAS].close()
+            del connections.databases[ALIAS]
+        return users
+
+    def run(self, mode, path, users, options):
+        arguments = [
+            (mode, path, options['threads'], options['operations'],
+             options['write_ratio'], options['posts'], users,
+             number * options['threads'])
+            for number in range(options['processes'])
+        ]
+        # Дочерние процессы не должны унаследовать открытые соединения.
+        connections.close_all()
+        started = time.perf_counter()
+        with get_context('fork').Pool(options['processes']) as pool:
+            counts = sum(pool.starmap(worker, arguments), Counter())
+        counts['seconds'] = time.perf_counter() - started
+        return counts
+
+    def report(self, mode, counts):
+        seconds = counts['seconds']
+        self.stdout.write(
+            f'{mode:<8}'
+            f'{(counts["reads"] + counts["writes"]) / seconds:>12.0f}'
+            f'{counts["reads"] / seconds:>12.0f}'
+            f'{counts["writes"] / seconds:>12.0f}'
+            f'{counts["errors"]:>8}'
+        )
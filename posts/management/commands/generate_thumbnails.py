@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.images import make_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Создает недостающие миниатюры картинок постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Число процессов, обрабатывающих картинки.'
+        )
+        parser.add_argument(
+            '--watch', type=float, default=0, metavar='SECONDS',
+            help='Не завершаться, а проверять очередь с этим интервалом.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько постов брать из очереди за один проход.'
+        )
+
+    def handle(self, *args, **options):
+        failed = set()
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            while True:
+                batch = list(
+                    thumbnails.pending().exclude(pk__in=failed).order_by(
+                        'pk'
+                    ).values_list('pk', 'image')[:options['batch_size']]
+                )
+                futures = {
+                    executor.submit(make_thumbnails, image): (post_id, image)
+                    for post_id, image in batch
+                }
+                for future in as_completed(futures):
+                    post_id, image = futures[future]
+                    try:
+                        thumbnails.store(post_id, image, future.result())
+                    except Exception as error:
+                        failed.add(post_id)
+                        self.stderr.write(f'Пост {post_id}: {error}')
+                if batch:
+                    self.stdout.write(f'Обработано постов: {len(batch)}')
+                    continue
+                if not options['watch']:
+                    break
+                time.sleep(options['watch'])
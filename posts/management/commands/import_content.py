@@ -0,0 +1,220 @@
+import json
+import sys
+import time
+from itertools import islice
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import caching
+from posts.models import Comment, Follow, Group, Post, User
+
+MODELS = {
+    'user': User,
+    'group': Group,
+    'post': Post,
+    'comment': Comment,
+    'follow': Follow,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует пользователей, группы, посты, комментарии и подписки '
+        'из JSONL пакетными вставками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл JSONL или "-" для чтения из stdin.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Сколько строк одной модели вставлять одним bulk_create.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=50000,
+            help='Сколько строк файла обрабатывать в одной транзакции.'
+        )
+        parser.add_argument(
+            '--skip-rebuild', action='store_true',
+            help='Не пересчитывать счетчики и ленты подписок после импорта.'
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.next_pk = {
+            model: (model.objects.order_by('-pk').values_list(
+                'pk', flat=True
+            ).first() or 0) + 1
+            for model in (User, Group)
+        }
+        # Посты адресуются своим числовым id из файла со сдвигом на текущий
+        # максимум, поэтому карта постов в памяти не нужна.
+        self.post_offset = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        self.buffers = {model: [] for model in MODELS.values()}
+        self.touched_authors = set()
+        self.touched_groups = set()
+        self.totals = dict.fromkeys(MODELS, 0)
+
+        stream = (
+            sys.stdin if options['path'] == '-'
+            else open(options['path'], encoding='utf-8')
+        )
+        pub_date_field = Post._meta.get_field('pub_date')
+        created_field = Comment._meta.get_field('created')
+        pub_date_field.auto_now_add = created_field.auto_now_add = False
+        started = time.monotonic()
+        line_number = 0
+        try:
+            while True:
+                chunk = list(islice(stream, options['chunk_size']))
+                if not chunk:
+                    break
+                with transaction.atomic():
+                    for line in chunk:
+                        line_number += 1
+                        if line.strip():
+                            self.add(line_number, line)
+                    self.flush()
+                self.bump_touched()
+                rows = sum(self.totals.values())
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'Строк: {line_number}, импортировано: {rows}, '
+                    f'{rows / max(elapsed, 1e-6):.0f} строк/с'
+                )
+        finally:
+            pub_date_field.auto_now_add = created_field.auto_now_add = True
+            if stream is not sys.stdin:
+                stream.close()
+
+        if not options['skip_rebuild']:
+            call_command('recount_counters', stdout=self.stdout)
+            call_command('rebuild_timelines', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            'Импортировано: ' + ', '.join(
+                f'{kind} {total}' for kind, total in self.totals.items()
+            ) + f' за {time.monotonic() - started:.1f} с'
+        ))
+
+    def bump_touched(self):
+        # Версии сбрасываются после каждой зафиксированной порции: набор
+        # затронутых авторов и групп не растет на весь файл, а уже
+        # видимые посты не ждут конца импорта.
+        caching.bump('feed', *(
+            f'author:{pk}' for pk in self.touched_authors
+        ), *(
+            f'group:{pk}' for pk in self.touched_groups
+        ))
+        self.touched_authors.clear()
+        self.touched_groups.clear()
+
+    def add(self, line_number, line):
+        try:
+            record = json.loads(line)
+            kind = record.pop('type')
+            builder = getattr(self, f'build_{kind}')
+        except (ValueError, KeyError, AttributeError, TypeError):
+            raise CommandError(f'Строка {line_number}: неизвестная запись.')
+        try:
+            obj = builder(record)
+        except (KeyError, ValueError, TypeError) as error:
+            raise CommandError(f'Строка {line_number}: {error!r}')
+        if obj is None:
+            return
+        buffer = self.buffers[MODELS[kind]]
+        buffer.append(obj)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        # Порядок вставки повторяет зависимости внешних ключей.
+        for kind, model in MODELS.items():
+            objs = self.buffers[model]
+            if not objs:
+                continue
+            model.objects.bulk_create(
+                objs, ignore_conflicts=model is Follow
+            )
+            self.totals[kind] += len(objs)
+            objs.clear()
+
+    def allocate(self, model):
+        pk = self.next_pk[model]
+        self.next_pk[model] += 1
+        return pk
+
+    def parse_date(self, value):
+        if not value:
+            return timezone.now()
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f'неверная дата {value!r}')
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def build_user(self, record):
+        username = record['username']
+        if username in self.users:
+            return None
+        pk = self.users[username] = self.allocate(User)
+        return User(
+            pk=pk,
+            username=username,
+            first_name=record.get('first_name', ''),
+            last_name=record.get('last_name', ''),
+            email=record.get('email', ''),
+            password='!',
+        )
+
+    def build_group(self, record):
+        slug = record['slug']
+        if slug in self.groups:
+            return None
+        pk = self.groups[slug] = self.allocate(Group)
+        return Group(
+            pk=pk,
+            slug=slug,
+            title=record['title'],
+            description=record.get('description', ''),
+        )
+
+    def build_post(self, record):
+        author_id = self.users[record['author']]
+        group_id = None
+        if record.get('group'):
+            group_id = self.groups[record['group']]
+        self.touched_authors.add(author_id)
+        if group_id is not None:
+            self.touched_groups.add(group_id)
+        return Post(
+            pk=self.post_offset + int(record['id']),
+            text=record['text'],
+            author_id=author_id,
+            group_id=group_id,
+            pub_date=self.parse_date(record.get('pub_date')),
+        )
+
+    def build_comment(self, record):
+        return Comment(
+            post_id=self.post_offset + int(record['post']),
+            author_id=self.users[record['author']],
+            text=record['text'],
+            created=self.parse_date(record.get('created')),
+        )
+
+    def build_follow(self, record):
+        user_id = self.users[record['user']]
+        author_id = self.users[record['author']]
+        if user_id == author_id:
+            return None
+        return Follow(user_id=user_id, author_id=author_id)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import Follow, User
+
+
+class Command(BaseCommand):
+    help = 'Заполняет и обрезает материализованные ленты подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', action='append', dest='usernames', default=[],
+            help='Перестроить ленту только для указанного пользователя.'
+        )
+        parser.add_argument(
+            '--trim-only', action='store_true',
+            help='Не перестраивать ленты, только обрезать их до лимита.'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = Follow.objects.values_list('user_id', flat=True).distinct()
+        if options['usernames']:
+            user_ids = User.objects.filter(
+                username__in=options['usernames']
+            ).values_list('pk', flat=True)
+        processed = trimmed = 0
+        for user_id in user_ids.iterator():
+            if options['trim_only']:
+                trimmed += timeline.trim(user_id)
+            else:
+                timeline.rebuild(user_id)
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано лент: {processed}, удалено записей: {trimmed}'
+        ))
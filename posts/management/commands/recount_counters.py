@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from posts import caching, counters
+from posts.models import AuthorStats, Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики комментариев, постов и подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, ничего не исправляя.'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        with transaction.atomic():
+            post_drift = list(counters.find_post_drift())
+            stats_drift = list(counters.find_stats_drift())
+            if not dry_run:
+                for post_id, actual in post_drift:
+                    Post.objects.filter(pk=post_id).update(
+                        comment_count=actual, version=F('version') + 1
+                    )
+                for user_id, actual in stats_drift:
+                    AuthorStats.objects.update_or_create(
+                        user_id=user_id, defaults=actual
+                    )
+        if not dry_run:
+            # Карточки постов и профили в кеше показывают старые счетчики.
+            scopes = {f'author:{user_id}' for user_id, _ in stats_drift}
+            for post in Post.objects.filter(
+                pk__in=[post_id for post_id, _ in post_drift]
+            ).only('author_id', 'group_id'):
+                scopes |= caching.post_scopes(post)
+            caching.bump(*scopes)
+        posts_fixed, stats_fixed = len(post_drift), len(stats_drift)
+        verb = 'Найдено' if dry_run else 'Исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} расхождений: постов {posts_fixed}, '
+            f'авторов {stats_fixed}'
+        ))
@@ -0,0 +1,191 @@
+import random
+import time
+from datetime import timedelta
+from io import BytesIO
+from itertools import accumulate
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from posts import caching
+from posts.models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетический социальный граф для бенчмарков: авторов '
+        'со степенным распределением подписчиков, посты, комментарии и '
+        'картинки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument(
+            '--comments', type=float, default=3.0,
+            help='Среднее число комментариев на пост.'
+        )
+        parser.add_argument(
+            '--follows', type=float, default=30.0,
+            help='Среднее число подписок на пользователя.'
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=1.5,
+            help='Показатель степенного распределения популярности (> 1).'
+        )
+        parser.add_argument(
+            '--images', type=float, default=0.2,
+            help='Доля постов с картинкой.'
+        )
+        parser.add_argument(
+            '--image-pool', type=int, default=20,
+            help='Сколько разных файлов картинок создать для постов.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--skip-rebuild', action='store_true',
+            help='Не пересчитывать счетчики и ленты подписок.'
+        )
+
+    def handle(self, *args, **options):
+        if options['alpha'] <= 1:
+            raise CommandError('--alpha должен быть больше 1.')
+        if options['users'] < 2:
+            raise CommandError('Нужно хотя бы два пользователя.')
+        self.rng = random.Random(options['seed'])
+        self.alpha = options['alpha']
+        started = time.monotonic()
+        users = self.seed_users(options['users'])
+        # Популярность автора убывает по закону Ципфа: первые авторы
+        # собирают большую часть подписчиков и пишут больше постов.
+        self.popularity = list(accumulate(
+            1 / rank ** self.alpha for rank in range(1, len(users) + 1)
+        ))
+        groups = self.seed_groups(options['groups']) + [None]
+        images = self.seed_images(options['image_pool'])
+        self.seed_follows(users, options['follows'])
+        self.seed_posts(users, groups, images, options)
+        if not options['skip_rebuild']:
+            call_command('recount_counters', stdout=self.stdout)
+            call_command('rebuild_timelines', stdout=self.stdout)
+        caching.bump('feed')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с'
+        ))
+
+    def next_pk(self, model):
+        return (model.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0) + 1
+
+    def popular(self, users, count):
+        return self.rng.choices(users, cum_weights=self.popularity, k=count)
+
+    def seed_users(self, total):
+        start = self.next_pk(User)
+        User.objects.bulk_create(
+            User(pk=start + i, username=f'reader-{start + i}', password='!')
+            for i in range(total)
+        )
+        return list(range(start, start + total))
+
+    def seed_groups(self, total):
+        start = self.next_pk(Group)
+        Group.objects.bulk_create(
+            Group(
+                pk=start + i, title=f'Группа {start + i}',
+                slug=f'group-{start + i}', description=''
+            )
+            for i in range(total)
+        )
+        return list(range(start, start + total))
+
+    def seed_images(self, total):
+        names = []
+        for i in range(total):
+            buffer = BytesIO()
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            Image.new('RGB', (1200, 800), color).save(buffer, 'JPEG')
+            names.append(default_storage.save(
+                f'posts/bench-{i}.jpg', ContentFile(buffer.getvalue())
+            ))
+        return names
+
+    def seed_follows(self, users, mean):
+        # Число подписок у читателя тоже с тяжелым хвостом: Парето
+        # с тем же показателем, нормированное на заданное среднее.
+        scale = mean * (self.alpha - 1) / self.alpha
+        batch = []
+        for user_id in users:
+            wanted = min(
+                len(users) - 1,
+                int(scale * self.rng.paretovariate(self.alpha))
+            )
+            authors = set(self.popular(users, wanted)) - {user_id}
+            batch.extend(
+                Follow(user_id=user_id, author_id=author_id)
+                for author_id in authors
+            )
+            if len(batch) >= BATCH_SIZE:
+                Follow.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        Follow.objects.bulk_create(batch, ignore_conflicts=True)
+
+    def seed_posts(self, users, groups, images, options):
+        total = options['posts']
+        post_pk = self.next_pk(Post)
+        started = timezone.now() - timedelta(days=365)
+        year = 365 * 24 * 3600
+        pub_date_field = Post._meta.get_field('pub_date')
+        created_field = Comment._meta.get_field('created')
+        pub_date_field.auto_now_add = created_field.auto_now_add = False
+        try:
+            for offset in range(0, total, BATCH_SIZE):
+                size = min(BATCH_SIZE, total - offset)
+                authors = self.popular(users, size)
+                posts = [
+                    Post(
+                        pk=post_pk + offset + i,
+                        text=f'Синтетический пост {post_pk + offset + i}',
+                        author_id=author_id,
+                        group_id=self.rng.choice(groups),
+                        image=(
+                            self.rng.choice(images)
+                            if images and self.rng.random() < options['images']
+                            else ''
+                        ),
+                        pub_date=started + timedelta(
+                            seconds=self.rng.randrange(year)
+                        ),
+                    )
+                    for i, author_id in enumerate(authors)
+                ]
+                commenters = self.popular(
+                    users, int(size * options['comments'])
+                )
+                with transaction.atomic():
+                    Post.objects.bulk_create(posts)
+                    Comment.objects.bulk_create(
+                        Comment(
+                            post_id=post.pk, author_id=author_id,
+                            text='Синтетический комментарий',
+                            created=post.pub_date + timedelta(
+                                minutes=self.rng.randrange(1, 600)
+                            )
+                        )
+                        for post, author_id in zip(
+                            self.rng.choices(posts, k=len(commenters)),
+                            commenters
+                        )
+                    )
+                self.stdout.write(f'Создано постов: {offset + size}')
+        finally:
+            pub_date_field.auto_now_add = created_field.auto_now_add = True
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def create_fts(apps, schema_editor):
+    from posts.search import install_fts, rebuild_fts
+    install_fts(schema_editor.connection)
+    rebuild_fts(schema_editor.connection)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in (
+        'DROP TRIGGER IF EXISTS posts_post_fts_update',
+        'DROP TRIGGER IF EXISTS posts_post_fts_delete',
+        'DROP TRIGGER IF EXISTS posts_post_fts_insert',
+        'DROP TABLE IF EXISTS posts_post_fts',
+    ):
+        schema_editor.execute(statement, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,219 @@
+import base64
+import binascii
+import json
+import math
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# Номера страниц ссылаются на OFFSET, поэтому ссылками становятся только
+# первые страницы; глубже лента листается курсорами.
+MAX_NUMBERED_PAGES = 50
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage(Sequence):
+    def __init__(self, object_list, paginator, has_next, has_previous,
+                 number=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.number = number
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_page_number(self):
+        return self.number + 1 if self.number else None
+
+    def previous_page_number(self):
+        return self.number - 1 if self.number else None
+
+    @property
+    def page_range(self):
+        if self.number is None or self.paginator.num_pages is None:
+            return []
+        return self.paginator.get_elided_page_range(self.number)
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(self.object_list[0])
+
+
+class CursorPaginator:
+    """Keyset-пагинация: страница выбирается условием по ключу сортировки,
+    а не OFFSET, поэтому стоимость не зависит от глубины и не нужен COUNT.
+
+    Если передан count (число или функция, которая его вернет, например
+    из кеша), страницы получают номера, а навигация — сокращенный ряд
+    номеров не длиннее max_pages.
+    """
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-pk'),
+                 count=None, max_pages=MAX_NUMBERED_PAGES):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self._count = count
+        self.max_pages = max_pages
+        opts = object_list.model._meta
+        self.fields = [
+            opts.pk if name.lstrip('-') == 'pk'
+            else opts.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+
+    @cached_property
+    def count(self):
+        return self._count() if callable(self._count) else self._count
+
+    @cached_property
+    def num_pages(self):
+        if self.count is None:
+            return None
+        return max(math.ceil(self.count / self.per_page), 1)
+
+    def get_elided_page_range(self, number, on_each_side=2, on_ends=1):
+        last = min(self.num_pages, self.max_pages)
+        pages = {
+            page for page in (
+                *range(1, on_ends + 1),
+                *range(number - on_each_side, number + on_each_side + 1),
+            )
+            if 1 <= page <= last
+        }
+        if last == self.num_pages:
+            pages.update(range(max(last - on_ends + 1, 1), last + 1))
+        # Текущая страница за пределом нумерации открыта курсором.
+        pages.add(number)
+        previous = 0
+        for page in sorted(pages):
+            if page - previous == 2:
+                yield previous + 1
+            elif page - previous > 2:
+                yield self.ELLIPSIS
+            yield page
+            previous = page
+        if previous < self.num_pages:
+            yield self.ELLIPSIS
+
+    def _lookup(self, name, field):
+        return 'pk' if name.lstrip('-') == 'pk' else field.name
+
+    def encode_cursor(self, obj):
+        values = [field.value_to_string(obj) for field in self.fields]
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw.decode())
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (
+            binascii.Error, UnicodeDecodeError, TypeError, ValueError,
+            ValidationError
+        ):
+            raise InvalidCursor(cursor)
+
+    def _seek(self, values, forward):
+        condition = Q()
+        equal = {}
+        for name, field, value in zip(self.ordering, self.fields, values):
+            descending = name.startswith('-')
+            lookup = self._lookup(name, field)
+            operator = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{lookup}__{operator}': value})
+            equal[lookup] = value
+        return condition
+
+    def page(self, after=None, before=None, number=None):
+        queryset = self.object_list
+        if number is not None and not (after or before):
+            return self._numbered_page(number)
+        if before:
+            reverse = [
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in self.ordering
+            ]
+            queryset = queryset.filter(
+                self._seek(self.decode_cursor(before), forward=False)
+            ).order_by(*reverse)
+            rows = list(queryset[:self.per_page + 1])
+            if len(rows) <= self.per_page:
+                return self.page()
+            return CursorPage(
+                rows[:self.per_page][::-1], self, True, True, number
+            )
+        queryset = queryset.order_by(*self.ordering)
+        if after:
+            queryset = queryset.filter(
+                self._seek(self.decode_cursor(after), forward=True)
+            )
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return CursorPage(
+            rows[:self.per_page], self, has_next, bool(after),
+            number if after else 1
+        )
+
+    def _numbered_page(self, number):
+        if not 1 < number <= self.max_pages:
+            return self.page()
+        offset = (number - 1) * self.per_page
+        rows = list(self.object_list.order_by(*self.ordering)[
+            offset:offset + self.per_page + 1
+        ])
+        if not rows:
+            return self.page()
+        return CursorPage(
+            rows[:self.per_page], self, len(rows) > self.per_page, True,
+            number
+        )
+
+    def get_page(self, after=None, before=None, number=None):
+        try:
+            number = int(number) if number else None
+        except ValueError:
+            number = None
+        if number is not None and number < 1:
+            number = None
+        try:
+            return self.page(after=after, before=before, number=number)
+        except InvalidCursor:
+            return self.page()
@@ -0,0 +1,92 @@
+from django.db import connections
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, counters, search, thumbnails, timeline
+from .models import Comment, Follow, Group, Post
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    previous = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', 'image'
+    ).first()
+    if previous is None:
+        return
+    instance._previous_group_id, previous_image = previous
+    if (instance.image.name or '') != (previous_image or ''):
+        instance.thumbnail = instance.thumbnail_variants = ''
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    caching.bump(*caching.post_scopes(
+        instance, getattr(instance, '_previous_group_id', None)
+    ))
+    if instance.image and not instance.thumbnail:
+        thumbnails.queue(instance)
+    if created:
+        counters.bump_stats(instance.author_id, posts_count=1)
+        timeline.fan_out(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    caching.bump(*caching.post_scopes(instance))
+    counters.bump_stats(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_comment_count(instance.post_id, 1)
+        caching.bump(*caching.post_scopes(instance.post))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.bump_comment_count(instance.post_id, -1)
+    # При каскадном удалении поста его строки уже может не быть.
+    post = Post.objects.filter(pk=instance.post_id).first()
+    if post is not None:
+        caching.bump(*caching.post_scopes(post))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        instance.posts.update(version=F('version') + 1)
+        author_ids = instance.posts.values_list(
+            'author_id', flat=True
+        ).distinct()
+        caching.bump('feed', f'group:{instance.pk}', *(
+            f'author:{author_id}' for author_id in author_ids
+        ))
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_stats(instance.author_id, followers_count=1)
+        counters.bump_stats(instance.user_id, following_count=1)
+        caching.bump(
+            f'author:{instance.author_id}', f'author:{instance.user_id}'
+        )
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.bump_stats(instance.author_id, followers_count=-1)
+    counters.bump_stats(instance.user_id, following_count=-1)
+    caching.bump(f'author:{instance.author_id}', f'author:{instance.user_id}')
+    timeline.remove_author(instance.user_id, instance.author_id)
+
+
+def restore_search_index(sender, using, **kwargs):
+    search.install_fts(connections[using], create=False)
@@ -0,0 +1,84 @@
+from django import template
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+
+from posts.models import Post
+
+register = template.Library()
+
+POST_TEMPLATE = 'includes/post_item.html'
+POST_TIMEOUT = 600
+
+
+@register.filter
+def is_author_of(user, post):
+    return user.is_authenticated and user.pk == post.author_id
+
+
+class URLs:
+    """Запоминает уже построенные адреса: у страницы ленты авторы и группы
+    повторяются, и reverse для них достаточно вызвать один раз.
+    """
+
+    def __init__(self):
+        self.built = {}
+
+    def __call__(self, name, *args):
+        key = (name, *args)
+        url = self.built.get(key)
+        if url is None:
+            url = self.built[key] = reverse(name, args=args)
+        return url
+
+
+def post_data(post, is_author, urls):
+    username = post.author.username
+    return {
+        'post': post,
+        'author_url': urls('profile', username),
+        'group_url': post.group and urls('groups', post.group.slug),
+        'post_url': urls('post', username, post.pk),
+        'edit_url': is_author and urls('post_edit', username, post.pk),
+    }
+
+
+@register.simple_tag(takes_context=True)
+def post_list(context, posts):
+    """Рендерит карточки постов за один проход: фрагменты всех постов
+    читаются из кеша одним get_many, недостающие рендерятся одним
+    скомпилированным шаблоном и сохраняются одним set_many.
+    """
+    posts = [posts] if isinstance(posts, Post) else list(posts)
+    if not posts:
+        return ''
+    user = context.get('user')
+    keys = {}
+    for post in posts:
+        is_author = user is not None and is_author_of(user, post)
+        keys[post.pk] = (make_template_fragment_key(
+            'post_item', [post.pk, post.version, is_author]
+        ), is_author)
+    cached = cache.get_many([key for key, is_author in keys.values()])
+    item_template = item_context = None
+    urls = URLs()
+    rendered = {}
+    parts = []
+    for post in posts:
+        key, is_author = keys[post.pk]
+        html = cached.get(key)
+        if html is None:
+            if item_template is None:
+                item_template = context.template.engine.get_template(
+                    POST_TEMPLATE
+                )
+                item_context = template.Context(
+                    autoescape=context.autoescape
+                )
+            with item_context.push(post_data(post, is_author, urls)):
+                html = rendered[key] = item_template.render(item_context)
+        parts.append(html)
+    if rendered:
+        cache.set_many(rendered, POST_TIMEOUT)
+    return mark_safe(''.join(parts))
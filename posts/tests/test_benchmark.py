@@ -0,0 +1,83 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from posts.models import Comment, Follow, Post, TimelineEntry, User
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        settings.MEDIA_ROOT = tempfile.mkdtemp(dir='media')
+        call_command(
+            'seed_benchmark_data', '--users', '30', '--groups', '3',
+            '--posts', '200', '--comments', '2', '--follows', '5',
+            '--image-pool', '2', stdout=StringIO()
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_seed_builds_power_law_graph(self):
+        """Генератор создает данные, а популярные авторы собирают больше
+        подписчиков."""
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 400)
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        users = list(User.objects.order_by('pk'))
+        followers = [
+            Follow.objects.filter(author=user).count() for user in users
+        ]
+        self.assertGreater(followers[0], followers[-1])
+        self.assertTrue(TimelineEntry.objects.exists())
+
+    def test_benchmark_reports_every_view(self):
+        """Бенчмарк проходит все представления и пишет JSON."""
+        with tempfile.NamedTemporaryFile('r', suffix='.json') as output:
+            call_command(
+                'benchmark_views', '--requests', '3', '--warmup', '1',
+                '--trace', '1', '--output', output.name, stdout=StringIO()
+            )
+            report = json.load(output)
+        self.assertEqual(report['dataset']['posts'], Post.objects.count())
+        self.assertEqual(set(report['views']), {
+            'index', 'group_posts', 'profile', 'post_view', 'follow_index',
+            'new_post', 'add_comment', 'follow_toggle',
+        })
+        for name, result in report['views'].items():
+            self.assertLess(max(result['status']), 400, name)
+            self.assertGreater(result['queries'], 0, name)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertEqual(report['views']['new_post']['status'], [302])
+
+    def test_compression_benchmark_covers_feed_pages(self):
+        """Бенчмарк сжатия замеряет HTML главной, группы и профиля."""
+        output = StringIO()
+        call_command('benchmark_compression', '--repeat', '1', stdout=output)
+        pages = {
+            line.split()[0] for line in output.getvalue().splitlines()
+            if line.split()[1].startswith('gzip')
+        }
+        self.assertEqual(pages, {'index', 'group', 'profile'})
+
+
+class PostListBenchmarkTests(SimpleTestCase):
+    def test_benchmark_compares_both_renderers(self):
+        """Микробенчмарк замеряет оба способа рендеринга ленты."""
+        output = StringIO()
+        call_command(
+            'benchmark_post_list', '--sizes', '10', '--repeat', '1',
+            stdout=output
+        )
+        rows = [line.split() for line in output.getvalue().splitlines()[1:]]
+        self.assertEqual(
+            [row[:2] for row in rows], [['10', 'include'], ['10', 'post_list']]
+        )
@@ -0,0 +1,67 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.counters import get_stats
+from posts.models import AuthorStats, Comment, Follow, Post, User
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.follower = User.objects.create_user(username='valentinka')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+
+    def test_comment_updates_comment_count(self):
+        """Создание и удаление комментария меняют comment_count."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.follower, text='Комментарий'
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_post_and_follow_update_author_stats(self):
+        """Посты и подписки меняют счетчики автора и подписчика."""
+        Post.objects.create(text='Еще пост', author=self.author)
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.assertEqual(get_stats(self.author).posts_count, 2)
+        self.assertEqual(get_stats(self.author).followers_count, 1)
+        self.assertEqual(get_stats(self.follower).following_count, 1)
+        Follow.objects.filter(user=self.follower, author=self.author).delete()
+        self.assertEqual(get_stats(self.author).followers_count, 0)
+        self.assertEqual(get_stats(self.follower).following_count, 0)
+
+    def test_recount_command_repairs_drift(self):
+        """Команда recount_counters исправляет рассинхронизацию."""
+        Comment.objects.create(
+            post=self.post, author=self.follower, text='Комментарий'
+        )
+        Post.objects.filter(pk=self.post.pk).update(comment_count=7)
+        AuthorStats.objects.update_or_create(
+            user=self.author, defaults={'posts_count': 42}
+        )
+        call_command('recount_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(get_stats(self.author).posts_count, 1)
+
+    def test_recount_command_refreshes_cached_cards(self):
+        """После пересчета лента показывает исправленный счетчик."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        Post.objects.filter(pk=self.post.pk).update(comment_count=7)
+        self.assertContains(
+            self.client.get(reverse('index')), 'Комментариев: 7'
+        )
+        call_command('recount_counters', stdout=StringIO())
+        self.assertNotContains(
+            self.client.get(reverse('index')), 'Комментариев: 7'
+        )
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='tolstoy')
+        cls.group = Group.objects.create(
+            title='Классики', slug='classics', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Все счастливые семьи похожи друг на друга',
+            author=cls.author, group=cls.group
+        )
+        cls.urls = (
+            reverse('group_feed', args=[cls.group.slug]),
+            reverse('author_feed', args=[cls.author.username]),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_are_atom(self):
+        """Ленты группы и автора отдаются в формате Atom."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(
+                    response['Content-Type'].startswith('application/atom')
+                )
+                self.assertContains(response, self.post.text)
+
+    def test_polling_does_not_hit_database(self):
+        """Повторные опросы ленты обслуживаются кешем и 304."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    cached = self.client.get(url)
+                    not_modified = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(cached.status_code, 200)
+                self.assertEqual(not_modified.status_code, 304)
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост сразу появляется в лентах."""
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group
+        )
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, 'Новый пост')
+
+    def test_unknown_group_feed_is_not_found(self):
+        """Лента несуществующей группы возвращает 404."""
+        response = self.client.get(reverse('group_feed', args=['missing']))
+        self.assertEqual(response.status_code, 404)
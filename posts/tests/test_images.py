@@ -0,0 +1,173 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post, User
+
+
+def make_upload(name='photo.jpg', size=(1200, 800), image_format='JPEG'):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, image_format)
+    return SimpleUploadedFile(
+        name=name,
+        content=buffer.getvalue(),
+        content_type=f'image/{image_format.lower()}'
+    )
+
+
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        settings.MEDIA_ROOT = tempfile.mkdtemp(dir='media')
+        cls.user = User.objects.create_user(username='leo')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=self.user,
+            image=make_upload()
+        )
+
+    def test_feed_shows_placeholder_until_ready(self):
+        """Пока миниатюры нет, лента показывает заглушку."""
+        response = Client().get(reverse('index'))
+        self.assertContains(response, 'data:image/svg+xml')
+        self.assertIn(self.post, thumbnails.pending())
+
+    def test_generated_thumbnail_is_rendered(self):
+        """Готовая миниатюра нужного размера попадает в ленту."""
+        thumbnails.generate(self.post)
+        self.post.refresh_from_db()
+        with Image.open(default_storage.open(self.post.thumbnail)) as image:
+            self.assertEqual(image.size, (960, 339))
+        response = Client().get(reverse('index'))
+        self.assertContains(response, self.post.thumbnail_url)
+        self.assertNotIn(self.post, thumbnails.pending())
+
+    def test_variants_are_rendered_as_srcset(self):
+        """Лента предлагает браузеру WebP и JPEG нескольких ширин."""
+        variants = thumbnails.generate(self.post)
+        self.assertEqual(
+            [width for width, height, name in variants['webp']],
+            [480, 960]
+        )
+        for width, height, name in variants['webp']:
+            with Image.open(default_storage.open(name)) as image:
+                self.assertEqual(image.format, 'WEBP')
+                self.assertEqual(image.size, (width, height))
+        self.post.refresh_from_db()
+        response = Client().get(reverse('index'))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, self.post.webp_srcset)
+        self.assertContains(response, self.post.jpeg_srcset)
+        self.assertIn(' 480w, ', self.post.webp_srcset)
+
+    def test_thumbnail_follows_exif_orientation(self):
+        """Миниатюра снимка с телефона повернута по EXIF Orientation."""
+        image = Image.new('RGB', (1600, 1200), 'red')
+        image.paste('blue', (0, 600, 1600, 1200))
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', exif=exif)
+        self.post.image = SimpleUploadedFile(
+            'phone.jpg', buffer.getvalue(), 'image/jpeg'
+        )
+        self.post.save()
+        variants = thumbnails.generate(self.post)
+        # Повернутый снимок шириной 1200: варианта 1440 нет.
+        self.assertEqual(
+            [width for width, height, name in variants['jpeg']], [480, 960]
+        )
+        name = variants['jpeg'][-1][2]
+        with Image.open(default_storage.open(name)) as thumbnail:
+            left = thumbnail.getpixel((10, 170))
+            right = thumbnail.getpixel((950, 170))
+        self.assertGreater(left[2], left[0])
+        self.assertGreater(right[0], right[2])
+
+    def test_new_image_resets_thumbnail(self):
+        """Замена картинки ставит пост в очередь заново."""
+        thumbnails.generate(self.post)
+        self.post.refresh_from_db()
+        self.post.image = make_upload(name='other.jpg')
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail, '')
+        self.assertEqual(self.post.thumbnail_variants, '')
+
+
+class ImageIngestionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        settings.MEDIA_ROOT = tempfile.mkdtemp(dir='media')
+        cls.user = User.objects.create_user(username='leo')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, upload):
+        return self.authorized_client.post(
+            reverse('new_post'),
+            data={'text': 'Пост с картинкой', 'image': upload}
+        )
+
+    @override_settings(POST_IMAGE_MAX_SIDE=1000)
+    def test_oversized_original_is_downscaled(self):
+        """Слишком большой оригинал уменьшается и перекодируется."""
+        self.create_post(make_upload(name='big.png', size=(3000, 1500),
+                                     image_format='PNG'))
+        post = Post.objects.get()
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        with Image.open(default_storage.open(post.image.name)) as image:
+            self.assertEqual(image.size, (1000, 500))
+            self.assertEqual(image.format, 'JPEG')
+
+    def test_small_image_is_kept_as_is(self):
+        """Картинка в пределах лимитов сохраняется без изменений."""
+        upload = make_upload(name='small.png', size=(300, 200),
+                             image_format='PNG')
+        content = upload.read()
+        upload.seek(0)
+        self.create_post(upload)
+        post = Post.objects.get()
+        self.assertEqual(default_storage.open(post.image.name).read(), content)
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=10 ** 6)
+    def test_too_many_pixels_rejected(self):
+        """Картинка с превышением лимита пикселей не принимается."""
+        response = self.create_post(make_upload(size=(1200, 1000)))
+        self.assertFormError(
+            response, 'form', 'image',
+            'Картинка слишком большая: не более 1 мегапикселей.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_BYTES=100)
+    def test_too_many_bytes_rejected(self):
+        """Слишком тяжелый файл не принимается."""
+        self.create_post(make_upload())
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,91 @@
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from posts import caching
+from posts.counters import get_stats
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+
+RECORDS = [
+    {'type': 'user', 'username': 'leo'},
+    {'type': 'user', 'username': 'tolstoy'},
+    {'type': 'group', 'slug': 'cats', 'title': 'Коты'},
+    {'type': 'post', 'id': 1, 'author': 'tolstoy', 'group': 'cats',
+     'text': 'Первый', 'pub_date': '2019-01-01T10:00:00'},
+    {'type': 'post', 'id': 2, 'author': 'tolstoy',
+     'text': 'Второй', 'pub_date': '2019-01-02T10:00:00'},
+    {'type': 'comment', 'post': 1, 'author': 'leo', 'text': 'Мяу'},
+    {'type': 'comment', 'post': 1, 'author': 'leo', 'text': 'Мур'},
+    {'type': 'follow', 'user': 'leo', 'author': 'tolstoy'},
+    {'type': 'follow', 'user': 'leo', 'author': 'tolstoy'},
+]
+
+
+class ImportContentTests(TestCase):
+    def run_import(self, records, *args):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.jsonl', encoding='utf-8'
+        ) as source:
+            for record in records:
+                source.write(json.dumps(record, ensure_ascii=False) + '\n')
+            source.flush()
+            call_command(
+                'import_content', source.name, *args, stdout=StringIO()
+            )
+
+    def test_import_resolves_relations(self):
+        """Импорт связывает записи по именам и сохраняет даты."""
+        Post.objects.create(
+            text='Уже был', author=User.objects.create_user(username='old')
+        )
+        self.run_import(RECORDS, '--batch-size', '2', '--chunk-size', '3')
+        tolstoy = User.objects.get(username='tolstoy')
+        first = Post.objects.get(text='Первый')
+        self.assertEqual(first.author, tolstoy)
+        self.assertEqual(first.group, Group.objects.get(slug='cats'))
+        self.assertEqual(first.pub_date.year, 2019)
+        self.assertEqual(Post.objects.get(text='Второй').group, None)
+        self.assertEqual(
+            Comment.objects.filter(post=first).count(), 2
+        )
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_import_rebuilds_derived_data(self):
+        """После импорта пересчитаны счетчики и ленты подписок."""
+        self.run_import(RECORDS)
+        leo = User.objects.get(username='leo')
+        tolstoy = User.objects.get(username='tolstoy')
+        self.assertEqual(Post.objects.get(text='Первый').comment_count, 2)
+        self.assertEqual(get_stats(tolstoy).posts_count, 2)
+        self.assertEqual(get_stats(tolstoy).followers_count, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=leo).count(), 2
+        )
+
+    def test_versions_are_bumped_per_chunk(self):
+        """Версии лент сбрасываются после каждой порции, а не одним
+        огромным списком в конце импорта.
+        """
+        with mock.patch.object(
+            caching, 'bump', wraps=caching.bump
+        ) as bump:
+            self.run_import(RECORDS, '--chunk-size', '3', '--skip-rebuild')
+        tolstoy = User.objects.get(username='tolstoy')
+        cats = Group.objects.get(slug='cats')
+        self.assertEqual(bump.call_count, 3)
+        self.assertEqual(set(bump.call_args_list[1][0]), {
+            'feed', f'author:{tolstoy.pk}', f'group:{cats.pk}'
+        })
+        self.assertEqual(bump.call_args_list[2][0], ('feed',))
+
+    def test_unknown_author_is_reported(self):
+        """Ссылка на неизвестного автора останавливает импорт."""
+        with self.assertRaisesMessage(CommandError, 'Строка 1'):
+            self.run_import([
+                {'type': 'post', 'id': 1, 'author': 'nobody', 'text': '?'}
+            ])
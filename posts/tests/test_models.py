@@ -1,7 +1,7 @@
 
 from django.test import TestCase
 
-from posts.models import Post, Group, User
+from posts.models import Comment, Post, Group, User
 
 
 class PostModelTest(TestCase):
@@ -57,3 +57,21 @@ class PostModelTest(TestCase):
         group = PostModelTest.group
         expected_object_name = group.title
         self.assertEqual(expected_object_name, str(group))
+
+    def test_edit_keeps_concurrent_counter_updates(self):
+        """Сохранение устаревшего поста не затирает счетчик комментариев
+        и не повторяет уже занятый номер версии.
+        """
+        post = Post.objects.get(pk=PostModelTest.post.pk)
+        version = post.version
+        Comment.objects.create(
+            post=post, author=post.author, text='Комментарий'
+        )
+        post.text = 'Исправленный текст'
+        post.save()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(post.version, version + 2)
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Исправленный текст')
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(post.version, version + 2)
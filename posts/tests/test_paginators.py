@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.paginators import CursorPaginator
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=cls.user)
+            for i in range(25)
+        ]
+
+    def test_pages_cover_feed_without_gaps(self):
+        """Переход по курсорам проходит ленту без пропусков и повторов."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        page = paginator.page()
+        seen = list(page)
+        while page.has_next():
+            page = paginator.page(after=page.next_cursor)
+            seen.extend(page)
+        expected = sorted(
+            self.posts, key=lambda post: (post.pub_date, post.pk),
+            reverse=True
+        )
+        self.assertEqual(seen, expected)
+
+    def test_before_returns_previous_page(self):
+        """Курсор before возвращает предыдущую страницу."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first = paginator.page()
+        second = paginator.page(after=first.next_cursor)
+        self.assertTrue(second.has_previous())
+        previous = paginator.page(before=second.previous_cursor)
+        self.assertEqual(list(previous), list(first))
+        self.assertFalse(previous.has_previous())
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Испорченный курсор отдает первую страницу."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        page = paginator.get_page(after='не-курсор')
+        self.assertEqual(list(page), list(paginator.page()))
+
+    def test_index_next_page(self):
+        """Вторая страница главной доступна по курсору after."""
+        client = Client()
+        response = client.get(reverse('index'))
+        cursor = response.context['page'].next_cursor
+        response = client.get(reverse('index'), {'after': cursor})
+        self.assertEqual(len(response.context['page']), 10)
+        self.assertContains(response, '?before=')
+
+    def test_elided_page_range(self):
+        """Ряд номеров содержит края и окно вокруг текущей страницы."""
+        paginator = CursorPaginator(Post.objects.all(), 10, count=200)
+        self.assertEqual(
+            list(paginator.get_elided_page_range(10)),
+            [1, '…', 8, 9, 10, 11, 12, '…', 20]
+        )
+        self.assertEqual(
+            list(paginator.get_elided_page_range(3)),
+            [1, 2, 3, 4, 5, '…', 20]
+        )
+
+    def test_numbered_pages_are_capped(self):
+        """Номера дальше max_pages не ссылаются на OFFSET."""
+        paginator = CursorPaginator(
+            Post.objects.all(), 10, count=lambda: 10 ** 6, max_pages=30
+        )
+        self.assertEqual(
+            list(paginator.get_elided_page_range(29)),
+            [1, '…', 27, 28, 29, 30, '…']
+        )
+        self.assertEqual(
+            list(paginator.get_elided_page_range(500)), [1, '…', 500, '…']
+        )
+        self.assertEqual(paginator.get_page(number='31').number, 1)
+
+    def test_numbered_page_matches_cursor_page(self):
+        """Страница по номеру совпадает со страницей по курсору."""
+        paginator = CursorPaginator(Post.objects.all(), 10, count=25)
+        first = paginator.page()
+        second = paginator.page(after=first.next_cursor, number=2)
+        third = paginator.get_page(number='3')
+        self.assertEqual(list(paginator.get_page(number='2')), list(second))
+        self.assertEqual(third.number, 3)
+        self.assertEqual(len(third), 5)
+        self.assertEqual(list(third.page_range), [1, 2, 3])
+
+    def test_index_renders_page_numbers(self):
+        """Главная показывает номера страниц, а число постов кешируется."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        response = Client().get(reverse('index'), {'page': 2})
+        self.assertEqual(response.context['page'].number, 2)
+        self.assertContains(response, '?page=3')
+        self.assertContains(response, '&page=1')
+        Post.objects.create(text='Новый пост', author=self.user)
+        with self.assertNumQueries(1):
+            Client().get(reverse('index'), {'page': 3})
@@ -0,0 +1,48 @@
+from django.contrib.admin.sites import site
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.search import search_posts
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.cats = Post.objects.create(
+            text='Котики котики и немного собак', author=cls.user
+        )
+        cls.dogs = Post.objects.create(
+            text='Собаки лучше котиков', author=cls.user
+        )
+        cls.other = Post.objects.create(text='Про погоду', author=cls.user)
+
+    def test_search_is_ranked(self):
+        """Поиск находит посты и ставит самые релевантные первыми."""
+        self.assertEqual(search_posts('котик'), [self.cats, self.dogs])
+
+    def test_index_follows_post_changes(self):
+        """Изменение и удаление поста сразу видны в поиске."""
+        self.other.text = 'Погода для котиков'
+        self.other.save()
+        self.assertIn(self.other, search_posts('погода'))
+        self.other.delete()
+        self.assertEqual(search_posts('погода'), [])
+
+    def test_search_page(self):
+        """Страница /search/ показывает найденные посты."""
+        response = Client().get(reverse('search'), {'q': 'собак'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['posts']), 2)
+        self.assertContains(response, 'Собаки лучше котиков')
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке использует тот же индекс."""
+        model_admin = site._registry[Post]
+        request = RequestFactory().get('/admin/posts/post/')
+        queryset, _ = model_admin.get_search_results(
+            request, Post.objects.all(), 'погоду'
+        )
+        self.assertEqual(list(queryset), [self.other])
@@ -0,0 +1,141 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, User
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.follower = User.objects.create_user(username='valentinka')
+        cls.stranger = User.objects.create_user(username='kate')
+        cls.old_post = Post.objects.create(
+            text='Старый пост',
+            author=cls.author,
+        )
+
+    def test_follow_backfills_timeline(self):
+        """Подписка заполняет ленту уже опубликованными постами."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.follower, post=self.old_post
+            ).exists()
+        )
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает только в ленты подписчиков."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.follower, post=post
+            ).exists()
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.stranger).exists()
+        )
+
+    def test_unfollow_clears_timeline(self):
+        """Отписка удаляет посты автора из ленты."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        Follow.objects.filter(
+            user=self.follower, author=self.author
+        ).delete()
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.follower).exists()
+        )
+
+    @override_settings(TIMELINE_MAX_LENGTH=2)
+    def test_trim_keeps_newest_entries(self):
+        """Обрезка оставляет в ленте только самые свежие записи."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        newest = [
+            Post.objects.create(text='Пост', author=self.author)
+            for _ in range(3)
+        ][-2:]
+        timeline.trim(self.follower.pk)
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(
+                user=self.follower
+            ).values_list('post_id', flat=True)),
+            {post.pk for post in newest}
+        )
+
+    @override_settings(TIMELINE_MAX_LENGTH=5)
+    def test_fan_out_trims_followers_timelines(self):
+        """Новые посты не растят ленту подписчика сверх лимита."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        newest = [
+            Post.objects.create(text='Пост', author=self.author)
+            for _ in range(12)
+        ][-5:]
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(
+                user=self.follower
+            ).values_list('post_id', flat=True)),
+            {post.pk for post in newest}
+        )
+
+    def create_posts_with_same_date(self, count):
+        Follow.objects.create(user=self.follower, author=self.author)
+        TimelineEntry.objects.all().delete()
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.author) for i in range(count)
+        )
+        posts = Post.objects.filter(author=self.author).order_by('pk')
+        pub_date = timezone.now()
+        TimelineEntry.objects.bulk_create(
+            TimelineEntry(
+                user=self.follower, post=post,
+                author=self.author, pub_date=pub_date
+            )
+            for post in posts
+        )
+        return posts
+
+    def test_follow_pages_walk_posts_with_same_date(self):
+        """Листание подписок не теряет посты с одинаковым pub_date."""
+        posts = self.create_posts_with_same_date(25)
+        self.client.force_login(self.follower)
+        seen = []
+        params = {}
+        while True:
+            page = self.client.get(
+                reverse('follow_index'), params
+            ).context['page']
+            seen.extend(entry.post_id for entry in page)
+            if not page.has_next():
+                break
+            params = {'after': page.next_cursor}
+        self.assertEqual(seen, [post.pk for post in reversed(posts)])
+
+    @override_settings(TIMELINE_MAX_LENGTH=5)
+    def test_trim_with_same_date_keeps_exact_length(self):
+        """Обрезка при одинаковых pub_date оставляет ровно лимит."""
+        posts = self.create_posts_with_same_date(8)
+        timeline.trim(self.follower.pk)
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(
+                user=self.follower
+            ).values_list('post_id', flat=True)),
+            [post.pk for post in reversed(posts)][:5]
+        )
+
+    def test_rebuild_command_restores_timeline(self):
+        """Команда rebuild_timelines восстанавливает ленты подписчиков."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.follower, post=self.old_post
+            ).exists()
+        )
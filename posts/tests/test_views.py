@@ -1,15 +1,16 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
+from django.core.cache import cache, caches
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase
 from django.urls import reverse
 
-from posts.models import Post, Group
+from posts.models import Comment, Follow, Group, Post
 
 User = get_user_model()
 
@@ -68,6 +69,7 @@ class PostPagesTests(TestCase):
         super().tearDownClass()
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client_follower = Client()
@@ -197,18 +199,72 @@ class PostPagesTests(TestCase):
         """Тестирование кеша. """
         response_1 = self.authorized_client.get(reverse('index'))
 
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
+        response_2 = self.authorized_client.get(reverse('index'))
+        self.assertEqual(response_1.content, response_2.content)
+
         Post.objects.create(
             text='Новый пост',
             author=self.user,
         )
 
-        response_2 = self.authorized_client.get(reverse('index'))
-        self.assertEqual(response_1.content, response_2.content)
-
-        cache.clear()
-
         response_3 = self.authorized_client.get(reverse('index'))
         self.assertNotEqual(response_1.content, response_3.content)
+        self.assertContains(response_3, 'Новый пост')
+
+    def test_post_edit_invalidates_cached_item(self):
+        """Изменение поста сразу видно в закешированных страницах."""
+        self.guest_client.get(reverse('index'))
+        post = Post.objects.first()
+        post.text = 'Отредактированный пост'
+        post.save()
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, 'Отредактированный пост')
+
+    def test_cached_pages_do_not_leak_edit_button(self):
+        """Кнопка редактирования из кеша не видна другим пользователям."""
+        response = self.authorized_client.get(reverse('index'))
+        self.assertContains(response, 'Редактировать')
+        response = self.authorized_client_follower.get(reverse('index'))
+        self.assertNotContains(response, 'Редактировать')
+        response = self.guest_client.get(reverse('index'))
+        self.assertNotContains(response, 'Редактировать')
+
+    def test_post_list_reads_fragments_in_one_batch(self):
+        """Карточки страницы читаются из кеша одним запросом к кешу."""
+        self.guest_client.get(reverse('index'))
+        backend = caches['default']
+        with mock.patch.object(
+            backend, 'get_many', wraps=backend.get_many
+        ) as get_many, mock.patch.object(
+            backend, 'get', wraps=backend.get
+        ) as get:
+            response = self.guest_client.get(
+                reverse('profile', kwargs={'username': 'leo'})
+            )
+        self.assertEqual(get_many.call_count, 1)
+        self.assertEqual(len(get_many.call_args[0][0]), 10)
+        self.assertFalse(any(
+            'post_item' in str(call) for call in get.call_args_list
+        ))
+        self.assertEqual(
+            response.content.decode().count('Добавить комментарий'), 10
+        )
+
+    def test_profile_shows_follow_button_once(self):
+        """Кнопка подписки выводится один раз, а не у каждого поста."""
+        response = self.authorized_client_follower.get(
+            reverse('profile', kwargs={'username': 'leo'})
+        )
+        self.assertEqual(response.content.decode().count('Подписаться'), 1)
+
+    def test_cached_pages_vary_by_cursor(self):
+        """Разные страницы ленты не отдают один и тот же кеш."""
+        first = self.guest_client.get(reverse('index'))
+        second = self.guest_client.get(
+            reverse('index'), {'after': first.context['page'].next_cursor}
+        )
+        self.assertNotEqual(first.content, second.content)
 
     def test_authorized_client_follow(self):
         """Тестирование подписки """
@@ -292,3 +348,201 @@ class PostPagesTests(TestCase):
             reverse('follow_index'))
 
         self.assertEqual(response_2.content, response.content)
+
+
+class FeedQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.viewer = User.objects.create_user(username='valentinka')
+        for i in range(12):
+            author = User.objects.create_user(username=f'author{i}')
+            group = Group.objects.create(
+                title=f'Группа {i}',
+                slug=f'group-{i}',
+                description='Описание'
+            )
+            cls.post = Post.objects.create(
+                text='Тестовый пост',
+                author=author,
+                group=group
+            )
+            cls.post.comments.create(author=cls.viewer, text='Комментарий')
+            Follow.objects.create(user=cls.viewer, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.viewer)
+
+    def test_feed_views_fit_query_budget(self):
+        """Число запросов страниц не зависит от количества постов."""
+        author = self.post.author
+        # Для ленты и подписок один запрос — COUNT(*) для номеров страниц,
+        # после него число берется из кеша. Сессия и пользователь тоже
+        # читаются из кеша и запросов не добавляют.
+        budgets = {
+            reverse('index'): 2,
+            reverse('groups', kwargs={'slug': self.post.group.slug}): 3,
+            reverse('profile', kwargs={'username': author.username}): 5,
+            reverse('post', kwargs={
+                'username': author.username, 'post_id': self.post.id
+            }): 4,
+            reverse('follow_index'): 2,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(budget):
+                    response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='tolstoy')
+        cls.post = Post.objects.create(text='Вирусный пост', author=cls.author)
+        readers = [
+            User.objects.create_user(username=f'reader{i}') for i in range(3)
+        ]
+        Comment.objects.bulk_create(
+            Comment(
+                post=cls.post, author=readers[i % 3], text=f'Комментарий {i}'
+            )
+            for i in range(60)
+        )
+        cls.post_url = reverse('post', kwargs={
+            'username': cls.author.username, 'post_id': cls.post.id
+        })
+        cls.fragment_url = reverse('post_comments', kwargs={
+            'username': cls.author.username, 'post_id': cls.post.id
+        })
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_page_shows_first_comments(self):
+        """На странице поста только первая порция комментариев."""
+        response = self.client.get(self.post_url)
+        page = response.context['comment_page']
+        self.assertEqual(len(page), 50)
+        self.assertEqual(page[0].text, 'Комментарий 0')
+        self.assertContains(response, self.fragment_url + '?after=')
+
+    def test_fragment_returns_next_comments(self):
+        """Фрагмент отдает следующую порцию без обертки страницы."""
+        page = self.client.get(self.post_url).context['comment_page']
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                self.fragment_url, {'after': page.next_cursor}
+            )
+        self.assertTemplateUsed(response, 'includes/comment_list.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(
+            [comment.text for comment in response.context['comment_page']],
+            [f'Комментарий {i}' for i in range(50, 60)]
+        )
+        self.assertNotContains(response, 'Показать ещё')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='tolstoy')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group
+        )
+        cls.urls = {
+            'post': reverse('post', kwargs={
+                'username': cls.author.username, 'post_id': cls.post.id
+            }),
+            'profile': reverse('profile', kwargs={
+                'username': cls.author.username
+            }),
+            'group': reverse('groups', kwargs={'slug': cls.group.slug}),
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def revalidate(self, url, client=None):
+        client = client or self.client
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_return_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304 без рендеринга."""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(1):
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_changes_invalidate_etag(self):
+        """Новый комментарий, пост и подписка меняют ETag."""
+        etags = {
+            name: self.client.get(url)['ETag']
+            for name, url in self.urls.items()
+        }
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[name]
+                )
+                self.assertEqual(response.status_code, 200)
+        etag = self.client.get(self.urls['profile'])['ETag']
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertNotEqual(
+            self.client.get(self.urls['profile'])['ETag'], etag
+        )
+
+    def test_relogin_does_not_revalidate_stale_csrf_token(self):
+        """После выхода и входа страница поста не отдается как 304 со
+        старым CSRF-токеном, а форма комментария с новым токеном
+        принимается.
+        """
+        self.reader.set_password('war-and-peace')
+        self.reader.save()
+        client = Client(enforce_csrf_checks=True)
+        client.login(username='reader', password='war-and-peace')
+        client.get(self.urls['post'])
+        etag = client.get(self.urls['post'])['ETag']
+        client.logout()
+        client.login(username='reader', password='war-and-peace')
+        response = client.get(self.urls['post'], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response = client.post(
+            reverse('add_comment', kwargs={
+                'username': self.author.username, 'post_id': self.post.id
+            }),
+            {'text': 'Комментарий', 'csrfmiddlewaretoken': str(
+                response.context['csrf_token']
+            )}
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_etag_depends_on_viewer(self):
+        """Гость и авторизованный пользователь получают разные ETag."""
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        self.assertNotEqual(
+            self.client.get(self.urls['post'])['ETag'],
+            reader_client.get(self.urls['post'])['ETag'],
+        )
+        self.assertEqual(
+            self.revalidate(self.urls['post'], reader_client).status_code,
+            304
+        )
@@ -0,0 +1,82 @@
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from yatube import metrics
+
+from . import caching
+from .images import THUMBNAIL_SIZE, make_thumbnails
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS)
+    return _executor
+
+
+def pending():
+    return Post.objects.exclude(image='').exclude(
+        image__isnull=True
+    ).filter(thumbnail_variants='')
+
+
+def store(post_id, image_name, variants):
+    default = next(
+        name for width, height, name in variants['jpeg']
+        if width == THUMBNAIL_SIZE[0]
+    )
+    updated = Post.objects.filter(pk=post_id, image=image_name).update(
+        thumbnail=default,
+        thumbnail_variants=json.dumps(variants),
+        version=F('version') + 1
+    )
+    post = Post.objects.filter(pk=post_id).first()
+    if updated and post is not None:
+        caching.bump(*caching.post_scopes(post))
+    return updated
+
+
+def generate(post):
+    try:
+        with metrics.timer('thumbnail'):
+            variants = make_thumbnails(post.image.name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюру поста %s', post.pk)
+        return None
+    store(post.pk, post.image.name, variants)
+    return variants
+
+
+def _stored(post_id, image_name, future):
+    try:
+        store(post_id, image_name, future.result())
+    except Exception:
+        logger.exception('Не удалось создать миниатюру поста %s', post_id)
+    finally:
+        close_old_connections()
+
+
+def _submit(post_id, image_name):
+    if not settings.THUMBNAIL_WORKERS:
+        post = Post.objects.filter(pk=post_id, image=image_name).first()
+        if post is not None:
+            generate(post)
+        return
+    future = get_executor().submit(make_thumbnails, image_name)
+    metrics.incr('thumbnail_queued')
+    future.add_done_callback(partial(_stored, post_id, image_name))
+
+
+def queue(post):
+    transaction.on_commit(partial(_submit, post.pk, post.image.name))
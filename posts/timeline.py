@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import IntegerField, Value
+
+from .models import Follow, Post, TimelineEntry
+
+FAN_OUT_BATCH_SIZE = 1000
+
+
+def _entry(user_id, post):
+    return TimelineEntry(
+        user_id=user_id, post_id=post.pk,
+        author_id=post.author_id, pub_date=post.pub_date
+    )
+
+
+def fan_out(post):
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    batch = []
+    for user_id in follower_ids.iterator():
+        batch.append(_entry(user_id, post))
+        if len(batch) >= FAN_OUT_BATCH_SIZE:
+            _insert(batch)
+            batch = []
+    if batch:
+        _insert(batch)
+
+
+def _insert(batch):
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+    # Каждая запись удлиняет ленту подписчика, поэтому лишнее хвостовое
+    # обрезается сразу, одним DELETE на пачку.
+    trim_many([entry.user_id for entry in batch])
+
+
+def backfill(user_id, author_id, limit=None):
+    limit = limit or settings.TIMELINE_MAX_LENGTH
+    posts = Post.objects.filter(author_id=author_id).only(
+        'pk', 'author_id', 'pub_date'
+    ).order_by('-pub_date', '-pk')[:limit]
+    TimelineEntry.objects.bulk_create(
+        [_entry(user_id, post) for post in posts], ignore_conflicts=True
+    )
+    trim(user_id)
+
+
+def remove_author(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def trim(user_id, max_length=None):
+    return trim_many([user_id], max_length)
+
+
+def trim_many(user_ids, max_length=None):
+    """Оставляет в лентах пользователей max_length самых свежих записей.
+    Позиция считается оконной функцией в порядке ленты, так что записи с
+    одинаковым pub_date тоже режутся точно по границе.
+    """
+    max_length = max_length or settings.TIMELINE_MAX_LENGTH
+    if not user_ids:
+        return 0
+    opts = TimelineEntry._meta
+    table = connection.ops.quote_name(opts.db_table)
+    pk, user, pub_date, post = (
+        connection.ops.quote_name(opts.get_field(name).column)
+        for name in ('id', 'user', 'pub_date', 'post')
+    )
+    placeholders = ', '.join(['%s'] * len(user_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE {pk} IN ('
+            f'SELECT {pk} FROM (SELECT {pk}, ROW_NUMBER() OVER ('
+            f'PARTITION BY {user} ORDER BY {pub_date} DESC, {post} DESC'
+            f') AS position FROM {table} WHERE {user} IN ({placeholders})'
+            f') WHERE position > %s)', [*user_ids, max_length]
+        )
+        return cursor.rowcount
+
+
+@transaction.atomic
+def rebuild(user_id):
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    # Лента собирается одним INSERT ... SELECT, без объектов в Python.
+    posts = Post.objects.filter(author__following__user_id=user_id).annotate(
+        reader=Value(user_id, output_field=IntegerField())
+    ).order_by('-pub_date', '-pk').values_list(
+        'pk', 'author_id', 'pub_date', 'reader'
+    )[:settings.TIMELINE_MAX_LENGTH]
+    sql, params = posts.query.sql_with_params()
+    opts = TimelineEntry._meta
+    columns = ', '.join(
+        connection.ops.quote_name(opts.get_field(name).column)
+        for name in ('post', 'author', 'pub_date', 'user')
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {connection.ops.quote_name(opts.db_table)} '
+            f'({columns}) {sql}', params
+        )
@@ -1,17 +1,24 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='groups'),
+    path('group/<slug:slug>/feed/', feeds.group_feed, name='group_feed'),
     path('new/', views.new_post, name='new_post'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search, name='search'),
     path('<str:username>/', views.profile, name='profile'),
+    path('<str:username>/feed/', feeds.author_feed, name='author_feed'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path(
         '<str:username>/<int:post_id>/edit/',
         views.post_edit, name='post_edit'),
+    path(
+        '<str:username>/<int:post_id>/comments/',
+        views.post_comments, name='post_comments'
+    ),
     path(
         '<username>/<int:post_id>/comment',
         views.add_comment, name='add_comment'
@@ -1,33 +1,82 @@
+from functools import partial
+
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import render, redirect, get_object_or_404
+from django.views.decorators.http import condition
+
+from yatube.db.writes import serialize_writes
 
+from . import caching
+from .counters import get_stats
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Follow
+from .models import Post, Group, User, Follow, TimelineEntry
+from .paginators import CursorPaginator
+from .search import search_posts
+
+
+def _author_etag(request, username, **kwargs):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    return author_id and caching.etag(f'author:{author_id}', request)
+
+
+def _group_etag(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    return group_id and caching.etag(f'group:{group_id}', request)
+
+
+def _get_page(request, paginator):
+    return paginator.get_page(
+        request.GET.get('after'), request.GET.get('before'),
+        request.GET.get('page')
+    )
 
 
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    # Версия берется до чтения постов: свежая версия закрепляет запрос
+    # за основной базой.
+    feed_version = caching.get_version('feed')
+    post_list = Post.objects.for_feed()
+    paginator = CursorPaginator(
+        post_list, 10, count=partial(caching.cached_count, 'feed', post_list)
+    )
+    page = _get_page(request, paginator)
     return render(request, 'index.html', {
-        'page': page
+        'page': page, 'paginator': paginator,
+        'feed_version': feed_version,
+        'viewer_class': caching.viewer_class(request.user, page),
     })
 
 
+@condition(etag_func=_group_etag)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list_groups = group.posts.all()
-    paginator = Paginator(post_list_groups, 10)
-    page_number_groups = request.GET.get('page')
-    page = paginator.get_page(page_number_groups)
+    group_version = caching.get_version(f'group:{group.pk}')
+    post_list_groups = group.posts.for_feed()
+    paginator = CursorPaginator(post_list_groups, 10, count=partial(
+        caching.cached_count, f'group:{group.pk}', post_list_groups
+    ))
+    page = _get_page(request, paginator)
     return render(request, 'group.html', {
-        'group': group, 'page': page
+        'group': group, 'page': page, 'paginator': paginator,
+        'group_version': group_version,
+        'viewer_class': caching.viewer_class(request.user, page),
+    })
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts = search_posts(query) if query else []
+    return render(request, 'search.html', {
+        'query': query, 'posts': posts
     })
 
 
 @login_required
+@serialize_writes
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
@@ -40,36 +89,60 @@ def new_post(request):
     })
 
 
+@condition(etag_func=_author_etag)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    author_posts = author.posts.all()
-    paginator = Paginator(author_posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    count = author_posts.count()
-    followers_count = author.following.all().count()
-    following_count = author.follower.all().count()
+    author_posts = author.posts.for_feed()
+    stats = get_stats(author)
+    paginator = CursorPaginator(
+        author_posts, 10, count=stats.posts_count
+    )
+    page = _get_page(request, paginator)
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user, author=author).exists()
     return render(request, 'profile.html', {
-        'page': page, 'author': author, 'count': count,
-        'following': following, "followers_count": followers_count,
-        "following_count": following_count
+        'page': page, 'paginator': paginator,
+        'author': author, 'count': stats.posts_count,
+        'following': following, 'followers_count': stats.followers_count,
+        'following_count': stats.following_count
     })
 
 
+def _comment_page(request, post):
+    paginator = CursorPaginator(
+        post.comments.select_related('author'), 50,
+        ordering=('created', 'pk')
+    )
+    return paginator.get_page(request.GET.get('after'))
+
+
+@condition(etag_func=_author_etag)
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, id=post_id)
-    count = post.author.posts.count()
+    post = get_object_or_404(
+        Post.objects.for_feed(), author__username=username, id=post_id
+    )
+    stats = get_stats(post.author)
     form = CommentForm()
-    comments = post.comments.all()
+    comment_page = _comment_page(request, post)
     return render(request, 'post.html', {
-        'post': post, 'author': post.author, 'count': count,
-        'form': form, 'comments': comments
+        'post': post, 'author': post.author, 'count': stats.posts_count,
+        'form': form, 'comment_page': comment_page
+    })
+
+
+def post_comments(request, username, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author'),
+        author__username=username, id=post_id
+    )
+    comment_page = _comment_page(request, post)
+    return render(request, 'includes/comment_list.html', {
+        'post': post, 'comment_page': comment_page
     })
 
 
 @login_required
+@serialize_writes
 def post_edit(request, username, post_id):
     post = get_object_or_404(Post, author__username=username, id=post_id)
     if post.author != request.user:
@@ -100,6 +173,7 @@ def server_error(request):
 
 
 @login_required
+@serialize_writes
 def add_comment(request, username, post_id):
     post = get_object_or_404(Post, author__username=username, id=post_id)
     form = CommentForm(request.POST or None)
@@ -116,13 +190,17 @@ def add_comment(request, username, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    timeline = TimelineEntry.objects.filter(user=request.user).for_feed()
+    paginator = CursorPaginator(
+        timeline, 10, ordering=('-pub_date', '-post_id'), count=partial(
+            caching.cached_count, f'timeline:{request.user.pk}', timeline
+        )
+    )
+    page = _get_page(request, paginator)
     return render(request, 'follow.html', {
         'page': page,
         'paginator': paginator,
+        'posts': [entry.post for entry in page],
     })
 
 
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import middleware
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+USER_KEY = 'users:user:{}'
+USER_TIMEOUT = 60 * 60
+
+
+def remember(user):
+    cache.set(USER_KEY.format(user.pk), user, USER_TIMEOUT)
+
+
+def forget(user_id):
+    cache.delete(USER_KEY.format(user_id))
+
+
+def cached_user(request):
+    """Пользователь сессии из кеша. Запись годится, только если хеш пароля
+    в ней совпадает с хешем в сессии: после смены пароля, как и при
+    промахе, проверку делает обычный auth.get_user с запросом к базе.
+    """
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return auth.get_user(request)
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    user = cache.get(USER_KEY.format(user_id))
+    if (
+        user is not None
+        and backend_path in settings.AUTHENTICATION_BACKENDS
+        and session_hash
+        and constant_time_compare(session_hash, user.get_session_auth_hash())
+    ):
+        return user
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        remember(user)
+    return user
+
+
+def get_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = cached_user(request)
+    return request._cached_user
+
+
+class AuthenticationMiddleware(middleware.AuthenticationMiddleware):
+    """Как AuthenticationMiddleware из django.contrib.auth, но request.user
+    берется из общего кеша. Запись сбрасывается при сохранении и удалении
+    пользователя — смене пароля, правке в админке — и при выходе.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
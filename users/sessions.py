@@ -0,0 +1,54 @@
+import logging
+import threading
+
+from django.contrib.sessions.backends import cached_db, db
+from django.contrib.sessions.backends.base import UpdateError
+
+logger = logging.getLogger('yatube.sessions')
+_local = threading.local()
+
+
+def _pending():
+    return getattr(_local, 'pending', None)
+
+
+def start_request():
+    _local.pending = {}
+
+
+def finish_request():
+    """Сохраняет в базу сессии, измененные за запрос. Вызывается по
+    request_finished, то есть когда ответ уже отдан клиенту.
+    """
+    pending, _local.pending = _pending(), None
+    for session_key, store in (pending or {}).items():
+        try:
+            db.SessionStore.save(store)
+        except UpdateError:
+            # Сессию успели удалить (выход в другой вкладке), а save()
+            # вернул ее в кеш: убираем, иначе выход не подействует.
+            store._cache.delete(store.cache_key)
+        except Exception:
+            logger.exception('Не удалось сохранить сессию %s', session_key)
+
+
+class SessionStore(cached_db.SessionStore):
+    """Сессии читаются из общего кеша, база нужна только при промахе.
+    Изменения сразу попадают в кеш, а в базу — отложенно, после ответа:
+    внутри запроса сохранение копится и записывается один раз в конце.
+    Создание и удаление сессии пишутся в базу сразу, иначе нельзя
+    проверить уникальность ключа и выход не действовал бы до записи.
+    """
+
+    def save(self, must_create=False):
+        pending = _pending()
+        if pending is None or must_create or self.session_key is None:
+            return super().save(must_create)
+        self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+        pending[self.session_key] = self
+
+    def delete(self, session_key=None):
+        pending = _pending()
+        if pending is not None:
+            pending.pop(session_key or self.session_key, None)
+        super().delete(session_key)
@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import middleware, sessions
+
+User = get_user_model()
+
+
+@receiver(request_started)
+def request_started_(sender, **kwargs):
+    sessions.start_request()
+
+
+@receiver(request_finished)
+def request_finished_(sender, **kwargs):
+    sessions.finish_request()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Вход обновляет только last_login: кешированная запись остается.
+    if update_fields != frozenset({'last_login'}):
+        middleware.forget(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    middleware.forget(instance.pk)
+
+
+@receiver(user_logged_in)
+def logged_in(sender, user, **kwargs):
+    middleware.remember(user)
+
+
+@receiver(user_logged_out)
+def logged_out(sender, user, **kwargs):
+    if user is not None:
+        middleware.forget(user.pk)
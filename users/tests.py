@@ -0,0 +1,119 @@
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import User
+
+from . import sessions
+
+
+class CachedSessionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='leo', password='war-and-peace'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.addCleanup(sessions.finish_request)
+
+    def get_user(self):
+        return self.client.get(reverse('index')).context['user']
+
+    def test_feed_does_not_query_session_or_user(self):
+        """Лента для вошедшего и анонима не читает сессию и пользователя
+        из базы.
+        """
+        for client in (self.client, Client()):
+            with self.subTest(client=client):
+                client.get(reverse('index'))
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(reverse('index'))
+                self.assertEqual(response.status_code, 200)
+                for query in queries:
+                    self.assertNotIn('FROM "django_session"', query['sql'])
+                    self.assertNotIn('FROM "auth_user"', query['sql'])
+        self.assertEqual(self.get_user(), self.user)
+
+    def test_password_change_logs_out_other_sessions(self):
+        """После смены пароля кешированный пользователь не пускает
+        старую сессию.
+        """
+        self.get_user()
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('anna-karenina')
+        user.save()
+        self.assertFalse(self.get_user().is_authenticated)
+
+    def test_admin_edit_is_visible_immediately(self):
+        """Правка пользователя сбрасывает его запись в кеше."""
+        self.get_user()
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        self.assertFalse(self.get_user().is_authenticated)
+
+    def test_logout_deletes_session_everywhere(self):
+        """Выход удаляет сессию из кеша и базы сразу."""
+        session_key = self.client.session.session_key
+        self.client.get(reverse('logout'))
+        self.assertFalse(Session.objects.filter(pk=session_key).exists())
+        self.assertFalse(sessions.SessionStore().exists(session_key))
+        self.client.cookies['sessionid'] = session_key
+        self.assertFalse(self.get_user().is_authenticated)
+
+    def test_changes_are_written_after_request(self):
+        """Внутри запроса изменение сессии попадает только в кеш, а в
+        базу — в конце запроса.
+        """
+        session_key = self.client.session.session_key
+        sessions.start_request()
+        store = sessions.SessionStore(session_key)
+        store['theme'] = 'dark'
+        store.save()
+        self.assertNotIn(
+            'theme', Session.objects.get(pk=session_key).get_decoded()
+        )
+        self.assertEqual(sessions.SessionStore(session_key)['theme'], 'dark')
+        sessions.finish_request()
+        self.assertEqual(
+            Session.objects.get(pk=session_key).get_decoded()['theme'],
+            'dark'
+        )
+
+    def test_deleted_session_is_not_written_back(self):
+        """Удаленная в том же запросе сессия не восстанавливается."""
+        session_key = self.client.session.session_key
+        sessions.start_request()
+        store = sessions.SessionStore(session_key)
+        store['theme'] = 'dark'
+        store.save()
+        store.delete()
+        sessions.finish_request()
+        self.assertFalse(Session.objects.filter(pk=session_key).exists())
+
+    def test_logout_elsewhere_wins_over_pending_write(self):
+        """Сессия, удаленная другим запросом, пока этот ее менял, не
+        остается в кеше.
+        """
+        session_key = self.client.session.session_key
+        sessions.start_request()
+        store = sessions.SessionStore(session_key)
+        store['theme'] = 'dark'
+        store.save()
+        # Выход в другом процессе удалил сессию из кеша раньше, чем
+        # save() выше записал ее туда снова, а из базы — сейчас.
+        Session.objects.filter(pk=session_key).delete()
+        sessions.finish_request()
+        self.assertFalse(Session.objects.filter(pk=session_key).exists())
+        self.assertFalse(sessions.SessionStore(session_key).exists(
+            session_key
+        ))
+        self.assertFalse(self.get_user().is_authenticated)
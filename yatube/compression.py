@@ -0,0 +1,97 @@
+import secrets
+import struct
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript',
+    'application/xml', 'application/atom+xml', 'application/rss+xml',
+    'image/svg+xml',
+)
+GZIP_FNAME = 0x08
+
+
+def accepted_encodings(request):
+    """Разбирает Accept-Encoding в словарь {кодировка: q}."""
+    accepted = {}
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if coding.strip():
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+class GzipEncoder:
+    """Потоковый gzip. С padding в заголовок пишется имя файла случайной
+    длины до padding байт: длина ответа перестает точно следовать за
+    совпадениями секрета с отраженным вводом (защита от BREACH).
+    """
+    name = 'gzip'
+
+    def __init__(self, level=6, padding=0):
+        self._compressor = zlib.compressobj(
+            level, zlib.DEFLATED, -zlib.MAX_WBITS
+        )
+        self._crc = 0
+        self._size = 0
+        self._header = self.header(padding)
+
+    @staticmethod
+    def header(padding):
+        # Время изменения 0, XFL 0 и ОС 255 (неизвестна), как в RFC 1952.
+        flags = GZIP_FNAME if padding else 0
+        header = struct.pack('<BBBBIBB', 0x1f, 0x8b, 8, flags, 0, 0, 255)
+        if padding:
+            size = secrets.randbelow(padding) + 1
+            header += secrets.token_urlsafe(size)[:size].encode() + b'\0'
+        return header
+
+    def compress(self, data):
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        output = self._header + self._compressor.compress(data)
+        self._header = b''
+        return output
+
+    def finish(self):
+        output = self._header + self._compressor.flush()
+        self._header = b''
+        return output + struct.pack(
+            '<II', self._crc, self._size & 0xffffffff
+        )
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self, quality=5):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def compress(encoder, data):
+    return encoder.compress(data) + encoder.finish()
+
+
+def compress_sequence(encoder, chunks):
+    for chunk in chunks:
+        data = encoder.compress(chunk)
+        if data:
+            yield data
+    yield encoder.finish()
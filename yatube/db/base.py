@@ -0,0 +1,40 @@
+from django.db.backends.sqlite3 import base
+
+# Настройки соединения для рабочей нагрузки с одновременными читателями и
+# писателями. WAL не дает писателю блокировать чтения, а synchronous=NORMAL
+# в режиме WAL синхронизирует диск только на контрольных точках.
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'temp_store': 'MEMORY',
+    'cache_size': -20000,
+    'mmap_size': 128 * 2 ** 20,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Бэкенд SQLite, который настраивает каждое новое соединение
+    прагмами PRAGMAS (их можно переопределить в OPTIONS['pragmas']) и
+    начинает транзакции с BEGIN IMMEDIATE.
+    """
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        pragmas = {
+            **PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {})
+        }
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        # Отложенная транзакция, которая сначала читает, а потом пишет,
+        # получает "database is locked" сразу, без ожидания по timeout:
+        # SQLite не может повысить ее блокировку, пока пишет другой
+        # процесс. Блокировка записи в начале транзакции убирает эту ошибку.
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,65 @@
+import random
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db import transaction
+
+from yatube import metrics
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# Потоки процесса выстраиваются в очередь на этой блокировке, так что к
+# SQLite одновременно идет не больше одного писателя из процесса.
+_queue = threading.RLock()
+
+
+def is_locked_error(error):
+    return 'database is locked' in str(error)
+
+
+def run_serialized(func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Выполняет func в транзакции после остальных писателей процесса и
+    повторяет ее с экспоненциальной задержкой, если база занята другим
+    процессом.
+    """
+    if connections[using].in_atomic_block:
+        # Внешнюю транзакцию частично не повторить: ошибка уйдет наверх.
+        with _queue, transaction.atomic(using=using):
+            return func(*args, **kwargs)
+    retries = settings.SQLITE_WRITE_RETRIES
+    for attempt in range(retries + 1):
+        with metrics.timer('write_wait'):
+            _queue.acquire()
+        try:
+            with transaction.atomic(using=using):
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if not is_locked_error(error) or attempt == retries:
+                raise
+        finally:
+            _queue.release()
+        metrics.incr('write_retries')
+        time.sleep(
+            settings.SQLITE_WRITE_BACKOFF * 2 ** attempt
+            * random.uniform(0.5, 1.5)
+        )
+
+
+def serialize_writes(view):
+    """Ставит изменяющие запросы представления в очередь писателей, если
+    включен SQLITE_WRITE_QUEUE.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            not settings.SQLITE_WRITE_QUEUE
+            or request.method in SAFE_METHODS
+        ):
+            return view(request, *args, **kwargs)
+        return run_serialized(view, request, *args, **kwargs)
+
+    return wrapper
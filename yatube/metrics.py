@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.core.cache.backends import locmem
+from django.template.backends import django as django_backend
+
+from . import cache
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.counts = Counter()
+
+    @property
+    def elapsed(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+def start():
+    _local.metrics = RequestMetrics()
+    return _local.metrics
+
+
+def finish():
+    return _local.__dict__.pop('metrics', None)
+
+
+def current():
+    return getattr(_local, 'metrics', None)
+
+
+def incr(name, amount=1):
+    metrics = current()
+    if metrics is not None and not getattr(_local, 'muted', False):
+        metrics.counts[name] += amount
+
+
+@contextmanager
+def muted():
+    previous = getattr(_local, 'muted', False)
+    _local.muted = True
+    try:
+        yield
+    finally:
+        _local.muted = previous
+
+
+@contextmanager
+def timer(name):
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.durations[name] += (time.perf_counter() - started) * 1000
+        metrics.counts[name] += 1
+
+
+def query_timer(execute, sql, params, many, context):
+    with timer('db'):
+        return execute(sql, params, many, context)
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with timer('template'):
+            return self.template.render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Бэкенд шаблонов Django, который засекает время рендеринга страниц."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+_missing = object()
+
+
+class CacheMetricsMixin:
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        incr('cache_miss' if value is _missing else 'cache_hit')
+        return default if value is _missing else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        # Базовый get_many вызывает get для каждого ключа: не считаем дважды.
+        with muted():
+            found = super().get_many(keys, version)
+        incr('cache_hit', len(found))
+        incr('cache_miss', len(keys) - len(found))
+        return found
+
+
+class LocMemCache(CacheMetricsMixin, locmem.LocMemCache):
+    pass
+
+
+class SQLiteCache(CacheMetricsMixin, cache.SQLiteCache):
+    pass
@@ -0,0 +1,285 @@
+import logging
+import mimetypes
+import os
+import random
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from . import compression, metrics, routers
+from .queries import QueryInspector
+
+logger = logging.getLogger('yatube.requests')
+queries_logger = logging.getLogger('yatube.queries')
+
+
+class ServerTimingMiddleware:
+    """Замеряет каждый запрос: общее время, SQL, рендеринг шаблонов, кеш и
+    работу с миниатюрами. Итог уходит в заголовок Server-Timing и в лог.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.query_timer)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.finish()
+        total = request_metrics.elapsed
+        durations = request_metrics.durations
+        counts = request_metrics.counts
+        if settings.SERVER_TIMING:
+            entries = [
+                f'total;dur={total:.1f}',
+                f'db;dur={durations["db"]:.1f};desc="{counts["db"]} queries"',
+                f'tpl;dur={durations["template"]:.1f}',
+                f'cache;desc="{counts["cache_hit"]} hit, '
+                f'{counts["cache_miss"]} miss"',
+            ]
+            if counts['thumbnail'] or counts['thumbnail_queued']:
+                entries.append(
+                    f'thumb;dur={durations["thumbnail"]:.1f};'
+                    f'desc="{counts["thumbnail"]} made, '
+                    f'{counts["thumbnail_queued"]} queued"'
+                )
+            response['Server-Timing'] = ', '.join(entries)
+        match = request.resolver_match
+        fields = {
+            'url_name': match.view_name if match else None,
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': round(total, 2),
+            'db_queries': counts['db'],
+            'db_ms': round(durations['db'], 2),
+            'template_ms': round(durations['template'], 2),
+            'cache_hits': counts['cache_hit'],
+            'cache_misses': counts['cache_miss'],
+            'thumbnails': counts['thumbnail'],
+            'thumbnail_ms': round(durations['thumbnail'], 2),
+            'thumbnails_queued': counts['thumbnail_queued'],
+        }
+        logger.info(
+            ' '.join(f'{name}=%s' for name in fields),
+            *fields.values(), extra={'metrics': fields}
+        )
+        return response
+
+
+class QueryInspectorMiddleware:
+    """На доле запросов (QUERY_INSPECTOR_SAMPLE_RATE) собирает SQL и пишет
+    в лог повторяющиеся и медленные запросы с местом вызова в шаблоне или
+    коде.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_INSPECTOR_SAMPLE_RATE:
+            return self.get_response(request)
+        inspector = QueryInspector()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(inspector))
+            response = self.get_response(request)
+        match = request.resolver_match
+        url_name = match.view_name if match else None
+        for offender in inspector.offenders():
+            queries_logger.warning(
+                '%s query in %s: %d x %s (%.1f ms) at %s; python: %s',
+                offender['kind'], url_name, offender['count'],
+                offender['sql'], offender['total_ms'],
+                ', '.join(
+                    f'{site} x{count}' for site, count in offender['sites']
+                ),
+                offender['python'],
+                extra={'url_name': url_name, 'offender': offender}
+            )
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """Включает чтение с реплик на время запроса. Небезопасные методы и
+    запросы с cookie недавней записи читают только из основной базы, а
+    любой запрос, который что-то записал, ставит такую cookie на
+    REPLICA_PIN_SECONDS — дольше ожидаемого отставания реплик.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            pinned_until = float(
+                request.COOKIES.get(settings.REPLICA_PIN_COOKIE_NAME, 0)
+            )
+        except ValueError:
+            pinned_until = 0
+        routers.start_request(
+            pinned=pinned_until > time.time()
+            or request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.finish_request()
+        if wrote:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE_NAME,
+                str(time.time() + settings.REPLICA_PIN_SECONDS),
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax'
+            )
+        return response
+
+
+class StaticFilesMiddleware:
+    """Отдает файлы из STATIC_ROOT без отдельного веб-сервера. Если клиент
+    принимает br или gzip, отдается сжатый при collectstatic вариант.
+    Файлы с хешем в имени кешируются навсегда, остальные проверяются по
+    ETag, так что повторная загрузка страницы не качает статику заново.
+    """
+    encodings = (('br', '.br'), ('gzip', '.gz'))
+    hashed_name = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.path_info.startswith(settings.STATIC_URL)
+        ):
+            path = self.find(request.path_info[len(settings.STATIC_URL):])
+            if path is not None:
+                return self.serve(request, path)
+        return self.get_response(request)
+
+    def find(self, name):
+        root = os.path.realpath(settings.STATIC_ROOT)
+        path = os.path.realpath(os.path.join(root, name))
+        if path.startswith(root + os.sep) and os.path.isfile(path):
+            return path
+        return None
+
+    def negotiate(self, request, path):
+        accepted = compression.accepted_encodings(request)
+        for encoding, suffix in self.encodings:
+            if (
+                accepted.get(encoding, 0) > 0
+                and os.path.isfile(path + suffix)
+            ):
+                return encoding, path + suffix
+        return None, path
+
+    def serve(self, request, path):
+        encoding, served = self.negotiate(request, path)
+        stat = os.stat(served)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(stat.st_mtime)
+        )
+        if response is None:
+            content_type = (
+                mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            )
+            if request.method == 'HEAD':
+                response = HttpResponse(content_type=content_type)
+            else:
+                response = FileResponse(
+                    open(served, 'rb'), content_type=content_type
+                )
+            response['Content-Length'] = stat.st_size
+            response['Last-Modified'] = http_date(stat.st_mtime)
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        if self.hashed_name.search(path):
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}, immutable'
+            )
+        else:
+            response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class CompressionMiddleware:
+    """Сжимает текстовые ответы в br или gzip по Accept-Encoding, потоковые
+    — по мере отдачи. Если на странице выведен CSRF-токен, отдается gzip
+    со случайной длиной заголовка, чтобы по размеру ответа нельзя было
+    подобрать секрет (BREACH); у brotli такого места в заголовке нет.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoder = self.encoder(request)
+        if encoder is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compression.compress_sequence(
+                encoder, response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            content = compression.compress(encoder, response.content)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoder.name
+        return response
+
+    def compressible(self, response):
+        if response.has_header('Content-Encoding'):
+            return False
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_LENGTH
+        ):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0]
+        return content_type.strip().lower().startswith(
+            compression.COMPRESSIBLE_TYPES
+        )
+
+    def encoder(self, request):
+        accepted = compression.accepted_encodings(request)
+        has_secret = request.META.get('CSRF_COOKIE_USED', False)
+        if (
+            compression.brotli is not None
+            and accepted.get('br', 0) > 0
+            and not has_secret
+        ):
+            return compression.BrotliEncoder(
+                settings.COMPRESSION_BROTLI_QUALITY
+            )
+        if accepted.get('gzip', 0) > 0:
+            return compression.GzipEncoder(
+                settings.COMPRESSION_GZIP_LEVEL,
+                padding=settings.COMPRESSION_BREACH_PADDING
+                if has_secret else 0
+            )
+        return None
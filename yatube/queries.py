@@ -0,0 +1,113 @@
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+
+import django
+from django.conf import settings
+
+DJANGO_DIR = os.path.dirname(django.__file__)
+INSPECTOR_FILES = (
+    __file__,
+    os.path.join(os.path.dirname(__file__), 'middleware.py'),
+    os.path.join(os.path.dirname(__file__), 'metrics.py'),
+)
+
+_literals = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_placeholder_lists = re.compile(r'\((?:\s*%s\s*,)*\s*%s\s*\)')
+_spaces = re.compile(r'\s+')
+
+
+def normalize(sql):
+    sql = _literals.sub('?', sql)
+    sql = _placeholder_lists.sub('(...)', sql)
+    return _spaces.sub(' ', sql).replace('%s', '?').strip()
+
+
+def template_site(frame):
+    while frame is not None:
+        if frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                name = origin.template_name or origin.name
+                return f'{name}:{token.lineno}'
+        frame = frame.f_back
+    return None
+
+
+def python_site(frame):
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(settings.BASE_DIR)
+            and not filename.startswith(DJANGO_DIR)
+            and 'site-packages' not in filename
+            and filename not in INSPECTOR_FILES
+        ):
+            return (
+                f'{os.path.relpath(filename, settings.BASE_DIR)}:'
+                f'{frame.f_lineno} in {frame.f_code.co_name}'
+            )
+        frame = frame.f_back
+    return None
+
+
+class QueryInspector:
+    """Группирует SQL запроса по нормализованному тексту и находит
+    повторяющиеся (N+1) и медленные запросы вместе с местом вызова.
+    """
+
+    def __init__(self, repeat_threshold=None, slow_ms=None):
+        self.repeat_threshold = (
+            repeat_threshold or settings.QUERY_INSPECTOR_REPEAT_THRESHOLD
+        )
+        self.slow_ms = slow_ms or settings.QUERY_INSPECTOR_SLOW_MS
+        self.statements = defaultdict(list)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            frame = sys._getframe(1)
+            self.statements[normalize(sql)].append((
+                duration, template_site(frame), python_site(frame), sql
+            ))
+
+    @property
+    def total(self):
+        return sum(len(calls) for calls in self.statements.values())
+
+    def offenders(self):
+        found = []
+        for statement, calls in self.statements.items():
+            sites = Counter(
+                template or python or '?'
+                for duration, template, python, sql in calls
+            )
+            if len(calls) >= self.repeat_threshold:
+                found.append({
+                    'kind': 'repeated',
+                    'sql': statement,
+                    'count': len(calls),
+                    'total_ms': round(sum(call[0] for call in calls), 2),
+                    'sites': sites.most_common(3),
+                    'python': Counter(
+                        call[2] for call in calls
+                    ).most_common(1)[0][0],
+                })
+            for duration, template, python, sql in calls:
+                if duration >= self.slow_ms:
+                    found.append({
+                        'kind': 'slow',
+                        'sql': sql,
+                        'count': 1,
+                        'total_ms': round(duration, 2),
+                        'sites': [(template or python or '?', 1)],
+                        'python': python,
+                    })
+        return sorted(found, key=lambda item: -item['total_ms'])
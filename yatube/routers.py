@@ -0,0 +1,69 @@
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = threading.local()
+
+
+def start_request(pinned):
+    _state.in_request = True
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+def finish_request():
+    wrote = getattr(_state, 'wrote', False)
+    _state.in_request = _state.pinned = _state.wrote = False
+    return wrote
+
+
+def pin_to_primary():
+    # Закрепляет чтения запроса за основной базой без cookie: запрос сам
+    # ничего не записал, но видит, что данные только что изменились.
+    if getattr(_state, 'in_request', False):
+        _state.pinned = True
+
+
+def _is_mirror(alias):
+    # Реплика, указывающая на ту же базу, что и default (зеркало под
+    # тестами или один файл SQLite при разработке), ничего не разгружает,
+    # а незакоммиченные данные теста через ее соединение не видны.
+    replica = connections[alias].settings_dict
+    primary = connections[DEFAULT_DB_ALIAS].settings_dict
+    return all(
+        replica.get(key) == primary.get(key)
+        for key in ('ENGINE', 'NAME', 'HOST', 'PORT')
+    )
+
+
+class PrimaryReplicaRouter:
+    """Чтения внутри запроса уходят на реплики из DATABASE_REPLICAS, записи
+    и все остальное — на основную базу. После записи запрос закрепляется
+    за основной базой, чтобы пользователь сразу видел свои изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            not getattr(_state, 'in_request', False)
+            or _state.pinned
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        replicas = [
+            alias for alias in settings.DATABASE_REPLICAS
+            if not _is_mirror(alias)
+        ]
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        if getattr(_state, 'in_request', False):
+            _state.pinned = _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -27,11 +27,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.middleware.StaticFilesMiddleware',
+    'yatube.middleware.CompressionMiddleware',
+    'yatube.middleware.ServerTimingMiddleware',
+    'yatube.middleware.QueryInspectorMiddleware',
+    'yatube.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -40,7 +45,8 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yatube.metrics.DjangoTemplates',
+        'NAME': 'django',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -58,11 +64,38 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.db',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'timeout': 20,
+        },
+    },
+    'replica': {
+        'ENGINE': 'yatube.db',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'timeout': 20,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
 
+# Очередь писателей: изменяющие запросы одного процесса пишут в SQLite по
+# очереди и повторяются, если базу долго держит другой процесс. Обычно
+# хватает BEGIN IMMEDIATE и timeout, см. manage.py benchmark_writes.
+SQLITE_WRITE_QUEUE = False
+SQLITE_WRITE_RETRIES = 5
+SQLITE_WRITE_BACKOFF = 0.05
+
+DATABASE_ROUTERS = ['yatube.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = ['replica']
+REPLICA_PIN_COOKIE_NAME = 'primary_until'
+REPLICA_PIN_SECONDS = 10
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -90,19 +123,78 @@ USE_TZ = True
 
 LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = 'index'
+# Сессии читаются из общего кеша, без запроса к базе на каждую страницу.
+SESSION_ENGINE = 'users.sessions'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Ответы короче этого не сжимаются: выигрыш меньше заголовков.
+COMPRESSION_MIN_LENGTH = 200
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+# До скольких случайных байт добавлять в gzip-ответы с CSRF-токеном.
+COMPRESSION_BREACH_PADDING = 100
+
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+STATICFILES_STORAGE = 'yatube.staticfiles.CompressedManifestStaticFilesStorage'
+# Файлы с хешем в имени не меняются, поэтому кешируются на год.
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+POST_IMAGE_MAX_BYTES = 25 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 64 * 1000 * 1000
+POST_IMAGE_MAX_SIDE = 2048
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'yatube.metrics.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
     }
 }
+
+# Тесты работают с собственным файлом кеша, см. yatube/testing.py.
+TEST_RUNNER = 'yatube.testing.TestRunner'
+
+TIMELINE_MAX_LENGTH = 1000
+
+THUMBNAIL_WORKERS = 2
+
+SERVER_TIMING = DEBUG
+
+QUERY_INSPECTOR_SAMPLE_RATE = 1.0 if DEBUG else 0.01
+QUERY_INSPECTOR_REPEAT_THRESHOLD = 3
+QUERY_INSPECTOR_SLOW_MS = 100
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'require_debug_true': {
+            '()': 'django.utils.log.RequireDebugTrue',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'filters': ['require_debug_true'],
+        },
+    },
+    'loggers': {
+        'yatube.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'yatube.queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
@@ -0,0 +1,64 @@
+import gzip
+import os
+from urllib.parse import unquote, urlsplit
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from .compression import brotli
+
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.svg', '.json', '.txt', '.html', '.xml',
+    '.ico', '.ttf', '.eot', '.otf',
+)
+# Сжатый вариант сохраняется, только если он заметно меньше исходного.
+MIN_SAVING = 0.05
+
+
+def compress(path):
+    with open(path, 'rb') as source:
+        data = source.read()
+    limit = len(data) * (1 - MIN_SAVING)
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    # Варианты от прошлого collectstatic могли устареть.
+    for suffix in ('.gz', '.br'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) < limit:
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хранилище collectstatic: к именам файлов добавляется хеш
+    содержимого, а рядом с текстовыми файлами кладутся варианты .gz и,
+    если установлен brotli, .br. Их отдает StaticFilesMiddleware.
+    """
+    manifest_strict = False
+
+    def post_process(self, *args, **kwargs):
+        names = set()
+        for name, hashed_name, processed in super().post_process(
+            *args, **kwargs
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                names.update((name, hashed_name))
+            yield name, hashed_name, processed
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                compress(self.path(name))
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # До collectstatic файла в STATIC_ROOT нет: ссылаемся на
+            # исходное имя, в разработке его отдаст runserver.
+            if self.exists(unquote(urlsplit(name).path)):
+                raise
+            return name
@@ -0,0 +1,128 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from multiprocessing import get_context
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from yatube.cache import SQLiteCache
+
+
+def make_cache(location, **options):
+    return SQLiteCache(location, {'TIMEOUT': 60, 'OPTIONS': options})
+
+
+def increment(location, times):
+    cache = make_cache(location)
+    for _ in range(times):
+        cache.incr('hits')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = make_cache(self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_values_round_trip(self):
+        """Значения любых типов сохраняются и читаются обратно."""
+        values = {'int': 7, 'flag': True, 'text': 'пост', 'list': [1, 'a']}
+        for key, value in values.items():
+            self.cache.set(key, value)
+        self.assertEqual(self.cache.get_many(values), values)
+        self.assertIs(self.cache.get('flag'), True)
+        self.cache.delete_many(['int', 'text'])
+        self.assertIsNone(self.cache.get('int'))
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+
+    def test_entries_expire(self):
+        """Просроченные записи не читаются, а add может их заменить."""
+        self.cache.set('key', 'old', timeout=60)
+        self.cache.set('never', 'value', timeout=None)
+        later = time.time() + 61
+        with mock.patch('yatube.cache.time.time', return_value=later):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertFalse(self.cache.has_key('key'))
+            self.assertEqual(self.cache.get('never'), 'value')
+            self.assertTrue(self.cache.add('key', 'new'))
+            self.assertFalse(self.cache.add('key', 'newer'))
+            self.assertEqual(self.cache.get('key'), 'new')
+
+    def test_versions_are_isolated(self):
+        """Версии ключей не пересекаются, incr_version переносит значение."""
+        self.cache.set('key', 'v1', version=1)
+        self.assertIsNone(self.cache.get('key', version=2))
+        self.assertEqual(self.cache.incr_version('key', version=1), 2)
+        self.assertEqual(self.cache.get('key', version=2), 'v1')
+        self.assertIsNone(self.cache.get('key', version=1))
+
+    def test_incr_is_atomic_across_processes(self):
+        """incr из нескольких процессов не теряет обновлений."""
+        self.cache.set('hits', 0)
+        processes = [
+            get_context('fork').Process(
+                target=increment, args=(self.location, 100)
+            )
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(self.cache.get('hits'), 400)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_least_recently_used_are_culled(self):
+        """При переполнении вытесняются давно не читанные записи."""
+        cache = make_cache(self.location, MAX_ENTRIES=50, CULL_FREQUENCY=2)
+        now = time.time()
+        for i in range(60):
+            with mock.patch('yatube.cache.time.time', return_value=now + i):
+                cache.set(f'key{i}', i, timeout=None)
+        with mock.patch('yatube.cache.time.time', return_value=now + 500):
+            cache.get('key0')
+            cache._cull()
+        self.assertEqual(cache.get('key0'), 0)
+        self.assertIsNone(cache.get('key1'))
+        self.assertEqual(cache.get('key59'), 59)
+        self.assertLessEqual(
+            cache.connection.execute('SELECT COUNT(*) FROM cache').fetchone(),
+            (50,)
+        )
+
+    def test_get_many_keeps_entries_fresh(self):
+        """Чтение через get_many тоже защищает запись от вытеснения."""
+        cache = make_cache(self.location, MAX_ENTRIES=50, CULL_FREQUENCY=2)
+        now = time.time()
+        for i in range(60):
+            with mock.patch('yatube.cache.time.time', return_value=now + i):
+                cache.set(f'key{i}', i, timeout=None)
+        with mock.patch('yatube.cache.time.time', return_value=now + 500):
+            self.assertEqual(
+                cache.get_many(['key0', 'key1', 'missing']),
+                {'key0': 0, 'key1': 1}
+            )
+            cache._cull()
+        self.assertEqual(cache.get_many(['key0', 'key1']), {
+            'key0': 0, 'key1': 1
+        })
+        self.assertIsNone(cache.get('key2'))
+
+    def test_many_keys_fit_sqlite_variable_limit(self):
+        """Операции над множеством ключей не упираются в лимит
+        переменных SQLite.
+        """
+        cache = make_cache(self.location, MAX_ENTRIES=10000)
+        cache.connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        data = {f'key{i}': i for i in range(3000)}
+        cache.set_many(data)
+        self.assertEqual(cache.get_many(data), data)
+        cache.delete_many(data)
+        self.assertEqual(cache.get_many(data), {})
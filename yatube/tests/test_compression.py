@@ -0,0 +1,82 @@
+import gzip
+from unittest import skipUnless
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, SimpleTestCase
+
+from yatube import compression
+from yatube.middleware import CompressionMiddleware
+
+PAGE = '<p>Пост о котиках</p>\n' * 200
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def compress(self, response, encoding='gzip', csrf=False):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=encoding)
+        if csrf:
+            get_token(request)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_html_is_gzipped(self):
+        """HTML сжимается gzip, а ETag становится слабым."""
+        response = HttpResponse(PAGE)
+        response['ETag'] = '"page"'
+        response = self.compress(response)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"page"')
+        self.assertEqual(gzip.decompress(response.content).decode(), PAGE)
+        self.assertEqual(
+            int(response['Content-Length']), len(response.content)
+        )
+
+    def test_streaming_response_is_compressed_incrementally(self):
+        """Потоковый ответ сжимается по частям без Content-Length."""
+        chunks = (line.encode() for line in PAGE.splitlines(True))
+        response = self.compress(StreamingHttpResponse(chunks))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body).decode(), PAGE)
+
+    def test_skips_small_encoded_and_binary_responses(self):
+        """Короткие, уже сжатые и двоичные ответы не трогаются."""
+        encoded = HttpResponse(PAGE)
+        encoded['Content-Encoding'] = 'br'
+        responses = [
+            HttpResponse('<p>Коротко</p>'),
+            encoded,
+            HttpResponse(b'\x89PNG' * 500, content_type='image/png'),
+        ]
+        for response in responses:
+            with self.subTest(content_type=response['Content-Type']):
+                body = response.content
+                self.assertEqual(self.compress(response).content, body)
+        self.assertEqual(
+            self.compress(HttpResponse(PAGE), encoding='identity').content,
+            PAGE.encode()
+        )
+
+    def test_csrf_pages_get_random_length_padding(self):
+        """Страница с CSRF-токеном получает случайную длину ответа."""
+        sizes = set()
+        for _ in range(10):
+            response = self.compress(HttpResponse(PAGE), csrf=True)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertTrue(response.content[3] & compression.GZIP_FNAME)
+            self.assertEqual(
+                gzip.decompress(response.content).decode(), PAGE
+            )
+            sizes.add(len(response.content))
+        self.assertGreater(len(sizes), 1)
+
+    @skipUnless(compression.brotli, 'brotli не установлен')
+    def test_brotli_preferred_except_on_csrf_pages(self):
+        """brotli выбирается первым, кроме страниц с CSRF-токеном."""
+        response = self.compress(HttpResponse(PAGE), encoding='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        response = self.compress(
+            HttpResponse(PAGE), encoding='gzip, br', csrf=True
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+from django.test import (
+    Client, SimpleTestCase, TransactionTestCase, override_settings
+)
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube.db import writes
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'db.sqlite3')
+        self.handlers = []
+
+    def tearDown(self):
+        for handler in self.handlers:
+            handler.close_all()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def connect(self, engine='yatube.db', **options):
+        handler = ConnectionHandler({'default': {
+            'ENGINE': engine, 'NAME': self.path, 'OPTIONS': options,
+        }})
+        self.handlers.append(handler)
+        return handler['default']
+
+    def pragma(self, connection, name):
+        with connection.cursor() as cursor:
+            return cursor.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def insert_during_transaction(self, engine):
+        first = self.connect(engine)
+        first.cursor().execute(
+            'CREATE TABLE IF NOT EXISTS item (id INTEGER)'
+        )
+        second = self.connect(timeout=0)
+        # Так transaction.atomic начинает транзакцию на SQLite.
+        first.set_autocommit(
+            False, force_begin_transaction_with_broken_autocommit=True
+        )
+        try:
+            second.cursor().execute('INSERT INTO item VALUES (1)')
+        finally:
+            first.rollback()
+            first.set_autocommit(True)
+
+    def test_connection_pragmas(self):
+        """Новое соединение включает WAL и переопределения из OPTIONS."""
+        connection = self.connect(timeout=7, pragmas={'cache_size': -4096})
+        self.assertEqual(self.pragma(connection, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(connection, 'synchronous'), 1)
+        self.assertEqual(self.pragma(connection, 'busy_timeout'), 7000)
+        self.assertEqual(self.pragma(connection, 'cache_size'), -4096)
+
+    def test_transaction_takes_write_lock(self):
+        """Транзакция сразу берет блокировку записи, поэтому другой
+        писатель ждет ее конца, а не обгоняет ее."""
+        self.insert_during_transaction('django.db.backends.sqlite3')
+        with self.assertRaisesMessage(OperationalError, 'database is locked'):
+            self.insert_during_transaction('yatube.db')
+
+
+@override_settings(SQLITE_WRITE_RETRIES=2, SQLITE_WRITE_BACKOFF=0)
+class WriteQueueTests(TransactionTestCase):
+    def flaky_write(self, failures):
+        calls = []
+
+        def write():
+            calls.append(1)
+            User.objects.create(username=f'user{len(calls)}')
+            if len(calls) <= failures:
+                raise OperationalError('database is locked')
+            return len(calls)
+
+        return write
+
+    def test_retries_locked_writes(self):
+        """Запись, упершаяся в блокировку, откатывается и повторяется."""
+        self.assertEqual(writes.run_serialized(self.flaky_write(2)), 3)
+        self.assertEqual(
+            list(User.objects.values_list('username', flat=True)),
+            ['user3']
+        )
+
+    def test_gives_up_after_retries(self):
+        """После SQLITE_WRITE_RETRIES повторов ошибка уходит наверх."""
+        with self.assertRaisesMessage(OperationalError, 'locked'):
+            writes.run_serialized(self.flaky_write(3))
+        self.assertFalse(User.objects.exists())
+
+    @override_settings(SQLITE_WRITE_QUEUE=True)
+    def test_views_write_through_queue(self):
+        """С очередью записи новый пост сохраняется как обычно."""
+        client = Client()
+        client.force_login(User.objects.create_user(username='author'))
+        response = client.post(reverse('new_post'), {'text': 'Пост'})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Post.objects.filter(text='Пост').exists())
+
+
+class WriteBenchmarkTests(SimpleTestCase):
+    def test_tuned_backend_has_no_lock_errors(self):
+        """Под одновременной записью настроенный бэкенд не получает
+        "database is locked"."""
+        output = StringIO()
+        call_command(
+            'benchmark_writes', '--processes', '2', '--threads', '2',
+            '--operations', '20', '--write-ratio', '0.5', '--posts', '40',
+            '--mode', 'tuned', '--mode', 'queued', stdout=output
+        )
+        rows = [line.split() for line in output.getvalue().splitlines()[1:]]
+        self.assertEqual([row[0] for row in rows], ['tuned', 'queued'])
+        self.assertEqual([row[-1] for row in rows], ['0', '0'])
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        Post.objects.create(text='Пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(SERVER_TIMING=True)
+    def test_header_reports_request_breakdown(self):
+        """Заголовок Server-Timing содержит время, SQL, шаблоны и кеш."""
+        with CaptureQueriesContext(connection) as queries:
+            header = Client().get(reverse('index'))['Server-Timing']
+        for metric in ('total;dur=', 'db;dur=', 'tpl;dur=', 'cache;desc='):
+            self.assertIn(metric, header)
+        self.assertIn(f'"{len(queries)} queries"', header)
+        self.assertNotIn(' 0 miss', header)
+        header = Client().get(reverse('index'))['Server-Timing']
+        self.assertIn(' 0 miss', header)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_header_can_be_disabled(self):
+        """Без SERVER_TIMING заголовок не отдается, но лог пишется."""
+        with self.assertLogs('yatube.requests') as logs:
+            response = Client().get(
+                reverse('profile', args=[self.user.username])
+            )
+        self.assertFalse(response.has_header('Server-Timing'))
+        line = logs.records[0]
+        self.assertIn('url_name=profile', line.getMessage())
+        self.assertEqual(line.metrics['status'], 200)
+        self.assertGreater(line.metrics['db_queries'], 0)
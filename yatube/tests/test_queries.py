@@ -0,0 +1,99 @@
+from contextlib import contextmanager
+from unittest import mock
+
+from django.db import connection
+from django.template import engines
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase
+from django.urls import resolve, reverse
+
+from posts.models import Comment, Post, User
+from yatube.middleware import QueryInspectorMiddleware
+from yatube.queries import QueryInspector, normalize
+
+
+@contextmanager
+def inspected():
+    inspector = QueryInspector(repeat_threshold=3, slow_ms=10 ** 6)
+    with connection.execute_wrapper(inspector):
+        yield inspector
+
+
+class QueryInspectorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+        for i in range(4):
+            Comment.objects.create(
+                post=cls.post, text=f'Комментарий {i}',
+                author=User.objects.create_user(username=f'reader-{i}')
+            )
+
+    def test_normalize_collapses_literals(self):
+        """Запросы одной формы сводятся к одному тексту."""
+        self.assertEqual(
+            normalize('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 21'),
+            normalize('SELECT * FROM t WHERE id IN (%s)  LIMIT 5'),
+        )
+
+    def test_repeated_queries_point_to_python_line(self):
+        """N+1 в коде находится вместе со строкой вызова."""
+        with inspected() as inspector:
+            names = [
+                comment.author.username
+                for comment in Comment.objects.filter(post=self.post)
+            ]
+        self.assertEqual(len(names), 4)
+        offender, = inspector.offenders()
+        self.assertEqual(offender['kind'], 'repeated')
+        self.assertEqual(offender['count'], 4)
+        self.assertIn('auth_user', offender['sql'])
+        self.assertIn('test_queries.py', offender['python'])
+
+    def test_repeated_queries_point_to_template_line(self):
+        """N+1 в шаблоне находится вместе с номером строки шаблона."""
+        template = engines['django'].from_string(
+            '{% for comment in comments %}\n'
+            '{{ comment.author.username }}\n'
+            '{% endfor %}'
+        )
+        with inspected() as inspector:
+            template.render({'comments': self.post.comments.all()})
+        offender, = inspector.offenders()
+        site, count = offender['sites'][0]
+        self.assertTrue(site.endswith(':2'), site)
+        self.assertEqual(count, 4)
+
+    def test_slow_queries_are_reported(self):
+        """Запросы дольше порога попадают в отчет."""
+        inspector = QueryInspector(repeat_threshold=100, slow_ms=0.0001)
+        with connection.execute_wrapper(inspector):
+            Post.objects.count()
+        self.assertEqual(inspector.offenders()[0]['kind'], 'slow')
+
+    def test_post_page_has_no_repeated_queries(self):
+        """Страница поста с комментариями не делает N+1 запросов."""
+        with mock.patch('yatube.middleware.queries_logger') as logger:
+            response = Client().get(
+                reverse('post', args=['leo', self.post.pk])
+            )
+        self.assertEqual(response.status_code, 200)
+        logger.warning.assert_not_called()
+
+    def test_middleware_logs_offenders(self):
+        """Middleware пишет в лог найденные N+1 с именем страницы."""
+        def view(request):
+            request.resolver_match = resolve(reverse('index'))
+            for comment in Comment.objects.all():
+                comment.author.username
+            return HttpResponse()
+
+        middleware = QueryInspectorMiddleware(view)
+        with self.assertLogs('yatube.queries', 'WARNING') as logs:
+            middleware(RequestFactory().get('/'))
+        record, = logs.records
+        self.assertEqual(record.url_name, 'index')
+        self.assertEqual(record.offender['count'], 4)
+        self.assertIn('test_queries.py', record.getMessage())
@@ -0,0 +1,102 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+from yatube import routers
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(text='Пост', author=self.author)
+        self.writer = Client()
+        self.writer.force_login(self.author)
+        # Реплика — снимок основной базы: все, что записано после него,
+        # на реплике не видно, как при отставании репликации.
+        self.directory = tempfile.mkdtemp()
+        self.replica = connections['replica']
+        self.replica_settings = self.replica.settings_dict
+        self.snapshot()
+
+    def snapshot(self):
+        path = os.path.join(self.directory, 'replica.sqlite3')
+        connections['default'].ensure_connection()
+        self.replica.close()
+        snapshot = sqlite3.connect(path)
+        connections['default'].connection.backup(snapshot)
+        snapshot.close()
+        self.replica.settings_dict = {**self.replica_settings, 'NAME': path}
+
+    def tearDown(self):
+        self.replica.close()
+        self.replica.settings_dict = self.replica_settings
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def comments_url(self):
+        return reverse('post_comments', kwargs={
+            'username': 'author', 'post_id': self.post.pk
+        })
+
+    def test_writer_reads_primary_after_write(self):
+        """После записи автор читает из основной базы, гость — с реплики."""
+        response = self.writer.post(
+            reverse('add_comment', kwargs={
+                'username': 'author', 'post_id': self.post.pk
+            }),
+            {'text': 'Свежий комментарий'}
+        )
+        self.assertIn(settings.REPLICA_PIN_COOKIE_NAME, response.cookies)
+        self.assertContains(
+            self.writer.get(self.comments_url()), 'Свежий комментарий'
+        )
+        self.assertNotContains(
+            Client().get(self.comments_url()), 'Свежий комментарий'
+        )
+
+    def test_fresh_version_is_not_cached_from_lagging_replica(self):
+        """Сразу после записи гость читает ленту и группу из основной
+        базы: отстающая реплика не попадает в кеш под новой версией.
+        """
+        group = Group.objects.create(title='Группа', slug='group')
+        self.post.group = group
+        self.post.save()
+        self.snapshot()
+        Post.objects.create(
+            text='Свежий пост', author=self.author, group=group
+        )
+        for url in (
+            reverse('index'), reverse('groups', kwargs={'slug': 'group'})
+        ):
+            with self.subTest(url=url):
+                guest = Client()
+                self.assertContains(guest.get(url), 'Свежий пост')
+                self.assertContains(guest.get(url), 'Свежий пост')
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_settled_version_reads_replica(self):
+        """Когда версия старше REPLICA_PIN_SECONDS, гость читает реплику."""
+        Post.objects.create(text='Свежий пост', author=self.author)
+        self.assertNotContains(Client().get(reverse('index')), 'Свежий пост')
+
+    def test_reads_outside_request_use_primary(self):
+        """Вне запроса и внутри транзакции чтения идут в основную базу."""
+        Comment.objects.create(post=self.post, author=self.author, text='К')
+        self.assertEqual(Comment.objects.count(), 1)
+        routers.start_request(pinned=False)
+        try:
+            self.assertEqual(Comment.objects.count(), 0)
+            with transaction.atomic():
+                self.assertEqual(Comment.objects.count(), 1)
+        finally:
+            routers.finish_request()
@@ -0,0 +1,80 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+STYLES = 'body { color: black; }\n' * 200
+
+
+class StaticPipelineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # collectstatic сжимает и статику админки, brotli на ней медленный:
+        # тесты только читают STATIC_ROOT, поэтому собираем один раз.
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        with open(os.path.join(cls.source, 'site.css'), 'w') as styles:
+            styles.write(STYLES)
+        cls.static_settings = override_settings(
+            STATICFILES_DIRS=[cls.source], STATIC_ROOT=cls.root
+        )
+        cls.static_settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.url = staticfiles_storage.url('site.css')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.static_settings.disable()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        """collectstatic кладет файл с хешем в имени и его gzip-вариант."""
+        name = os.path.basename(self.url)
+        self.assertRegex(name, r'^site\.[0-9a-f]{12}\.css$')
+        with gzip.open(os.path.join(self.root, f'{name}.gz'), 'rt') as data:
+            self.assertEqual(data.read(), STYLES)
+
+    def test_hashed_file_is_served_compressed_and_immutable(self):
+        """Файл с хешем отдается сжатым и кешируется навсегда."""
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body).decode(), STYLES)
+
+    def test_plain_file_without_accepted_encoding(self):
+        """Без Accept-Encoding отдается исходный файл, а не сжатый."""
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(), STYLES
+        )
+
+    def test_repeat_request_transfers_nothing(self):
+        """Повторный запрос с ETag получает 304 без тела."""
+        response = self.client.get('/static/site.css')
+        self.assertIn('must-revalidate', response['Cache-Control'])
+        response = self.client.get(
+            '/static/site.css', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_files_outside_static_root_are_not_served(self):
+        """Путь с .. не выходит за пределы STATIC_ROOT."""
+        response = self.client.get('/static/../yatube/settings.py')
+        self.assertEqual(response.status_code, 404)